@@ -13,3 +13,24 @@ class Settings:
     # Paths
     BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     ASSETS_DIR = os.path.join(BASE_DIR, 'assets')
+
+    # User data (%APPDATA%\GestionComercial on Windows, ~/GestionComercial elsewhere)
+    DATA_DIR = os.path.join(os.getenv('APPDATA') or os.path.expanduser('~'), 'GestionComercial')
+
+    # Network printer for thermal tags: 'raw://host:9100', 'lpr://host/queue' or empty to keep the file
+    TAG_PRINTER = os.getenv('GESTION_TAG_PRINTER', '')
+
+    # Local HTTP API for tag generation (see tag_manager/api.py); port 0 keeps it off in the app
+    TAG_API_HOST = os.getenv('GESTION_TAG_API_HOST', '127.0.0.1')
+    TAG_API_PORT = int(os.getenv('GESTION_TAG_API_PORT', '0'))
+
+    # Register name stored with every cash count
+    CASH_REGISTER = os.getenv('GESTION_CAJA', 'Caja 1')
+
+    # Coin scale: serial port ('COM3', '/dev/ttyUSB0') or empty to type weights by hand
+    SCALE_PORT = os.getenv('GESTION_BALANZA', '')
+    SCALE_BAUDRATE = int(os.getenv('GESTION_BALANZA_BAUDIOS', '9600'))
+
+    # Currency counted by the cash counter; profiles live in config/currencies.json,
+    # or in a currencies.json in DATA_DIR that replaces it for a branch
+    CURRENCY = os.getenv('GESTION_MONEDA', 'CLP')
@@ -1,5 +1,6 @@
 import sys
 import os
+import multiprocessing
 import tkinter as tk
 
 # Add the current directory to sys.path to ensure imports work correctly
@@ -12,6 +13,9 @@ from gestion_comercial.core.app import MainApp
 from gestion_comercial.modules.launcher.view import LauncherView
 from gestion_comercial.modules.cash_counter.view import CashCounterView
 from gestion_comercial.modules.tag_manager.view import TagManagerView
+from gestion_comercial.modules.tag_manager.spool import SpoolManager
+from gestion_comercial.modules.tag_manager import api as tag_api
+from gestion_comercial.config.settings import Settings
 # Import licensing
 from gestion_comercial.licensing import LicenseValidator
 from gestion_comercial.modules.activation.view import show_activation_dialog
@@ -76,6 +80,13 @@ def main():
     # Licencia válida, iniciar aplicación
     app = MainApp()
 
+    # Limpiar documentos huérfanos de ejecuciones anteriores
+    SpoolManager.default()
+
+    # API local de etiquetas para el POS (desactivada si no hay puerto configurado)
+    if Settings.TAG_API_PORT:
+        tag_api.start_in_thread(port=Settings.TAG_API_PORT)
+
     # Register views
     app.navigator.register_view('launcher', LauncherView)
     app.navigator.register_view('cash_counter', CashCounterView)
@@ -88,4 +99,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Needed by the tag generation worker processes in the frozen build
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,142 @@
+"""
+Currency profiles for the cash counter.
+
+Profiles (bills and coins with their colors, label widths and coin
+weights) are declared in config/currencies.json. A currencies.json in
+the data directory replaces it, so a branch can count another currency
+or a new coin series without code changes. Each profile is validated
+and compiled once per process into parallel arrays indexed by
+denomination position; the model and the view both build from it.
+"""
+import json
+import os
+import re
+from array import array
+from functools import lru_cache
+from gestion_comercial.config.settings import Settings
+
+PROFILES_FILE = 'currencies.json'
+COLOR_PATTERN = re.compile(r'^#[0-9a-fA-F]{6}$')
+DEFAULT_LABEL_WIDTH = 12
+MAX_LABEL_WIDTH = 40
+
+
+class CurrencyProfileError(ValueError):
+    pass
+
+
+class CompiledCurrency:
+    """
+    A validated currency profile.
+
+    Denominations are ordered bills first, then coins, each from the
+    largest value down. `values`, `weights`, `widths` and `colors` are
+    parallel to `denominations`; `index` maps a value to its position.
+    """
+
+    __slots__ = ('code', 'name', 'symbol', 'thousands_separator', 'bills', 'coins_qty', 'coins_weight',
+                 'denominations', 'values', 'weights', 'widths', 'colors', 'index')
+
+    def __init__(self, code, name, symbol, thousands_separator, bills, coins):
+        self.code = code
+        self.name = name
+        self.symbol = symbol
+        self.thousands_separator = thousands_separator
+
+        self.bills = tuple(bill['value'] for bill in bills)
+        self.coins_qty = tuple(coin['value'] for coin in coins if not coin.get('weight_mg'))
+        # Unit weight in mg of the coins counted by weight
+        self.coins_weight = {coin['value']: coin['weight_mg'] for coin in coins if coin.get('weight_mg')}
+
+        entries = list(bills) + list(coins)
+        self.denominations = tuple(entry['value'] for entry in entries)
+        self.values = array('q', self.denominations)
+        self.weights = array('q', (entry.get('weight_mg') or 0 for entry in entries))
+        self.widths = array('b', (entry.get('width') or DEFAULT_LABEL_WIDTH for entry in entries))
+        self.colors = tuple(entry.get('color') for entry in entries)
+        self.index = {value: i for i, value in enumerate(self.denominations)}
+
+    def color(self, value, default=None):
+        return self.colors[self.index[value]] or default
+
+    def width(self, value):
+        return self.widths[self.index[value]]
+
+    def format_amount(self, amount):
+        """Whole amount with the currency symbol (20000 -> '$20.000')."""
+        return self.symbol + f"{int(amount):,}".replace(',', self.thousands_separator)
+
+
+def _check(condition, code, message):
+    if not condition:
+        raise CurrencyProfileError(f"Moneda {code}: {message}")
+
+
+def _denominations(code, entries, kind):
+    _check(isinstance(entries, list) and entries, code, f"'{kind}' debe ser una lista no vacía")
+    checked = []
+    for entry in entries:
+        _check(isinstance(entry, dict), code, f"cada elemento de '{kind}' debe ser un objeto")
+        value = entry.get('value')
+        _check(isinstance(value, int) and not isinstance(value, bool) and value > 0, code,
+               f"valor inválido en '{kind}': {value!r}")
+        color = entry.get('color')
+        _check(color is None or (isinstance(color, str) and COLOR_PATTERN.match(color)), code,
+               f"color inválido para {value}: {color!r}")
+        width = entry.get('width')
+        _check(width is None or (isinstance(width, int) and 0 < width <= MAX_LABEL_WIDTH), code,
+               f"ancho inválido para {value}: {width!r}")
+        weight = entry.get('weight_mg')
+        _check(weight is None or (isinstance(weight, int) and weight > 0), code,
+               f"peso inválido para {value}: {weight!r} (miligramos enteros)")
+        _check(kind == 'coins' or weight is None, code, f"el billete {value} no puede tener peso")
+        checked.append(entry)
+    return sorted(checked, key=lambda entry: entry['value'], reverse=True)
+
+
+def compile_profile(code, data):
+    """Validates one profile from the JSON file and compiles it."""
+    _check(isinstance(data, dict), code, "el perfil debe ser un objeto")
+    bills = _denominations(code, data.get('bills'), 'bills')
+    coins = _denominations(code, data.get('coins'), 'coins')
+    values = [entry['value'] for entry in bills + coins]
+    _check(len(set(values)) == len(values), code, "hay denominaciones repetidas")
+    symbol = data.get('symbol', '$')
+    separator = data.get('thousands_separator', '.')
+    _check(isinstance(symbol, str) and isinstance(separator, str), code, "símbolo o separador inválido")
+    return CompiledCurrency(code, data.get('name', code), symbol, separator, bills, coins)
+
+
+def profiles_path():
+    """The data directory copy wins over the one shipped in config/."""
+    override = os.path.join(Settings.DATA_DIR, PROFILES_FILE)
+    if os.path.exists(override):
+        return override
+    return os.path.join(Settings.BASE_DIR, 'config', PROFILES_FILE)
+
+
+def load_profiles(path):
+    """Reads and compiles every profile of a currencies file."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise CurrencyProfileError(f"No se pudo leer {path}: {e}")
+    if not isinstance(data, dict) or not data:
+        raise CurrencyProfileError(f"{path} no contiene perfiles de moneda.")
+    return {code: compile_profile(code, profile) for code, profile in data.items()}
+
+
+@lru_cache(maxsize=None)
+def get_currency(code=None):
+    """Compiled profile for `code` (Settings.CURRENCY by default), loaded once per process."""
+    code = code or Settings.CURRENCY
+    profiles = _loaded_profiles(profiles_path())
+    if code not in profiles:
+        raise CurrencyProfileError(f"Moneda '{code}' no está definida en {PROFILES_FILE}.")
+    return profiles[code]
+
+
+@lru_cache(maxsize=None)
+def _loaded_profiles(path):
+    return load_profiles(path)
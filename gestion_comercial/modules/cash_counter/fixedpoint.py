@@ -0,0 +1,72 @@
+"""
+Integer arithmetic for cash counts.
+
+Amounts are whole pesos and weights are whole milligrams, so every
+count, subtotal and total is exact. Text only becomes a number (and a
+number text) at the edges: parse_grams / format_grams for what the user
+types and sees.
+
+The batch helpers take many weights or many drawers at once. They use
+NumPy int64 arrays for large batches when it is installed, and plain
+integers otherwise, with the same results.
+"""
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
+MG_PER_GRAM = 1000
+NUMPY_MIN_BATCH = 256
+
+
+def parse_grams(text):
+    """
+    Parses a typed weight in grams ('75.7', '75,70', '0.5') exactly.
+
+    Returns:
+        int: The weight in milligrams (digits past the milligram are dropped),
+        or None if the text is not a weight
+    """
+    text = text.strip().replace(',', '.')
+    whole, _, fraction = text.partition('.')
+    if not whole and not fraction:
+        return 0 if not text else None
+    if (whole and not whole.isdigit()) or (fraction and not fraction.isdigit()):
+        return None
+    return int(whole or 0) * MG_PER_GRAM + int((fraction + '000')[:3])
+
+
+def format_grams(weight_mg):
+    """Milligrams as grams with three decimals (75700 -> '75.700')."""
+    grams, milligrams = divmod(weight_mg, MG_PER_GRAM)
+    return f"{grams}.{milligrams:03d}"
+
+
+def coins_from_weight(weight_mg, unit_mg):
+    """Nearest whole number of coins in a weight; halves round up."""
+    return (2 * weight_mg + unit_mg) // (2 * unit_mg)
+
+
+def coins_from_weights(weights_mg, unit_mg):
+    """coins_from_weight over a batch of weights (e.g. one coin type in many drawers)."""
+    if np is not None and len(weights_mg) >= NUMPY_MIN_BATCH:
+        weights = np.asarray(weights_mg, dtype=np.int64)
+        return ((2 * weights + unit_mg) // (2 * unit_mg)).tolist()
+    return [(2 * weight + unit_mg) // (2 * unit_mg) for weight in weights_mg]
+
+
+def drawer_totals(quantities, denominations):
+    """
+    Totals of many drawers at once.
+
+    Args:
+        quantities: One row per drawer, with a count per denomination in
+            the order of `denominations`
+        denominations: Peso value of each column
+
+    Returns:
+        list: Total pesos per drawer
+    """
+    if np is not None and len(quantities) >= NUMPY_MIN_BATCH:
+        return (np.asarray(quantities, dtype=np.int64) @ np.asarray(denominations, dtype=np.int64)).tolist()
+    return [sum(count * value for count, value in zip(row, denominations)) for row in quantities]
@@ -0,0 +1,202 @@
+"""
+Session ledger for the cash counter.
+
+Every committed count is appended to a SQLite table (WAL mode) with its
+register, shift and per-denomination detail. Rows are never updated or
+deleted: a recount of the same register and shift supersedes the earlier
+counts, so summaries take only the latest count of each day and shift.
+Writes go through a background thread that commits whatever has queued
+up in one transaction, so saving a count never waits on the disk.
+Indexes on (day, register) and (register, day) keep month-to-date
+summaries and reconciliation queries on index ranges, however many
+years of history the file holds.
+"""
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+from datetime import date, datetime
+from gestion_comercial.config.settings import Settings
+
+DB_NAME = 'cash_ledger.db'
+WRITE_BATCH = 500
+RETRY_DELAY = 2.0  # seconds before a failed batch is written again
+SHIFT_CHANGE_HOUR = 14  # counts before this hour belong to the morning shift
+
+
+def current_shift(now=None):
+    now = now or datetime.now()
+    return 'mañana' if now.hour < SHIFT_CHANGE_HOUR else 'tarde'
+
+
+class CashLedger:
+    """Append-only store of committed counts; writes happen on a background thread."""
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, path=None):
+        if path is None:
+            os.makedirs(Settings.DATA_DIR, exist_ok=True)
+            path = os.path.join(Settings.DATA_DIR, DB_NAME)
+        self.path = path
+        self.pending = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.last_error = None
+
+        # Read connection; the writer thread opens its own
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS counts (
+                id INTEGER PRIMARY KEY,
+                counted_at TEXT NOT NULL,
+                day TEXT NOT NULL,
+                register TEXT NOT NULL,
+                shift TEXT NOT NULL,
+                bills INTEGER NOT NULL,
+                coins INTEGER NOT NULL,
+                total INTEGER NOT NULL,
+                detail TEXT NOT NULL
+            );
+            -- Summaries read only the index: day range first, then register
+            CREATE INDEX IF NOT EXISTS counts_day ON counts (day, register, shift, total, bills, coins);
+            CREATE INDEX IF NOT EXISTS counts_register ON counts (register, day, shift, total);
+            CREATE TRIGGER IF NOT EXISTS counts_no_update BEFORE UPDATE ON counts BEGIN
+                SELECT RAISE(ABORT, 'El registro de conteos no se puede modificar');
+            END;
+            CREATE TRIGGER IF NOT EXISTS counts_no_delete BEFORE DELETE ON counts BEGIN
+                SELECT RAISE(ABORT, 'El registro de conteos no se puede modificar');
+            END;
+        """)
+        self.conn.commit()
+
+    @classmethod
+    def default(cls):
+        """Process-wide ledger; pending counts are written when the app exits."""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+                atexit.register(cls._default.close)
+            return cls._default
+
+    # Writing
+    def record(self, register, model, shift=None, counted_at=None):
+        """Queues the model's current count; returns without touching the disk."""
+        counted_at = counted_at or datetime.now()
+        detail = {
+            'quantities': {str(d): q for d, q in model.quantities.items() if q},
+            'weights_mg': {str(d): w for d, w in model.weights.items() if w},
+        }
+        row = (
+            counted_at.isoformat(timespec='seconds'), counted_at.date().isoformat(), register,
+            shift or current_shift(counted_at), model.totals['bills'], model.totals['coins'], model.total,
+            json.dumps(detail, separators=(',', ':')),
+        )
+        self.pending.put(row)
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='cash-ledger', daemon=True)
+                self.thread.start()
+
+    def flush(self):
+        """Blocks until every queued count went through a write (see last_error)."""
+        if self.thread is not None:
+            self.pending.join()
+
+    def _run(self):
+        conn = sqlite3.connect(self.path)
+        failed = []
+        while True:
+            rows = failed
+            try:
+                rows.append(self.pending.get(timeout=RETRY_DELAY if failed else None))
+                taken = 1
+            except queue.Empty:
+                taken = 0
+            # Whatever queued up meanwhile goes into the same transaction
+            while len(rows) < WRITE_BATCH:
+                try:
+                    rows.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+                taken += 1
+            try:
+                with conn:
+                    conn.executemany("""
+                        INSERT INTO counts (counted_at, day, register, shift, bills, coins, total, detail)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """, rows)
+                failed = []
+                self.last_error = None
+            except sqlite3.Error as e:
+                # Kept for the next batch; the database may be locked by a backup
+                failed = rows
+                self.last_error = str(e)
+            for _ in range(taken):
+                self.pending.task_done()
+
+    # Queries
+    def summary(self, start, end, register=None):
+        """
+        Totals per register for the days in [start, end], from the latest
+        count of each day and shift.
+
+        Returns:
+            list: (register, shifts, bills, coins, total) tuples
+        """
+        latest = "SELECT MAX(id) FROM counts WHERE day BETWEEN ? AND ?"
+        params = [start.isoformat(), end.isoformat()]
+        if register is not None:
+            latest += " AND register = ?"
+            params.append(register)
+        latest += " GROUP BY day, register, shift"
+        return self._fetch(f"""
+            SELECT register, COUNT(*), SUM(bills), SUM(coins), SUM(total) FROM counts
+            WHERE id IN ({latest})
+            GROUP BY register ORDER BY register
+        """, params)
+
+    def month_to_date(self, register=None, today=None):
+        today = today or date.today()
+        return self.summary(today.replace(day=1), today, register)
+
+    def daily_totals(self, register, start, end):
+        """
+        Per day and shift totals of one register, for reconciliation against sales.
+
+        Returns:
+            list: (day, shift, counts, total) tuples; `counts` is how many
+            times the shift was counted and `total` the latest of them
+        """
+        return self._fetch("""
+            SELECT counts.day, counts.shift, latest.counts, counts.total
+            FROM (
+                SELECT MAX(id) AS id, COUNT(*) AS counts FROM counts
+                WHERE register = ? AND day BETWEEN ? AND ?
+                GROUP BY day, shift
+            ) AS latest JOIN counts ON counts.id = latest.id
+            ORDER BY counts.day, counts.shift
+        """, (register, start.isoformat(), end.isoformat()))
+
+    def counts_for_day(self, day, register=None):
+        """Every count of a day in the order they were made, with the detail decoded."""
+        query = "SELECT counted_at, register, shift, bills, coins, total, detail FROM counts WHERE day = ?"
+        params = [day.isoformat()]
+        if register is not None:
+            query += " AND register = ?"
+            params.append(register)
+        query += " ORDER BY id"
+        return [row[:-1] + (json.loads(row[-1]),) for row in self._fetch(query, params)]
+
+    def _fetch(self, query, params):
+        with self.lock:
+            return self.conn.execute(query, params).fetchall()
+
+    def close(self):
+        self.flush()
+        with self.lock:
+            self.conn.close()
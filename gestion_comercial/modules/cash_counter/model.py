@@ -1,36 +1,132 @@
+from gestion_comercial.modules.cash_counter.fixedpoint import coins_from_weight, drawer_totals
+from gestion_comercial.modules.cash_counter.currency import get_currency
+
+
 class CashCounterModel:
-    def __init__(self):
-        # Denominations
-        self.bills = [20000, 10000, 5000, 2000, 1000]
-        
-        self.coins_weight = {
-            100: 7.57/1000,  # 7.57g
-            50: 7.0/1000,    # 7.0g
-            10: 3.5/1000     # 3.5g
-        }
-        
-        self.coins_qty = [500]
-        
+    """
+    Count of the register: quantity per denomination plus running totals.
+
+    Amounts are integer pesos and weights integer milligrams (see fixedpoint).
+
+    Setting a quantity adjusts the totals by the difference only, and the
+    keys of the values that changed are collected until the view takes
+    them with take_changes(): ('quantity' | 'weight' | 'subtotal', denom)
+    and ('total', 'bills' | 'coins' | 'general').
+    """
+
+    def __init__(self, currency=None):
+        # Denominations and coin unit weights (mg) come from the currency profile
+        self.currency = currency or get_currency()
+        self.bills = list(self.currency.bills)
+        self.coins_weight = self.currency.coins_weight
+        self.coins_qty = list(self.currency.coins_qty)
+
+        self.denominations = list(self.currency.denominations)
+        self.bill_set = frozenset(self.bills)
+        self.quantities = dict.fromkeys(self.denominations, 0)
+        self.weights = dict.fromkeys(self.coins_weight, 0)
+        self.totals = {'bills': 0, 'coins': 0}
+        self.changes = set()
+        self.revision = 0  # bumped on every change, so the view knows what it saved
+
+    @property
+    def total(self):
+        return self.totals['bills'] + self.totals['coins']
+
+    def subtotal(self, denomination):
+        return denomination * self.quantities[denomination]
+
+    def set_quantity(self, denomination, quantity):
+        """Sets a typed quantity; a weighed coin also gets its weight recomputed.
+
+        Returns:
+            bool: Whether anything changed
+        """
+        if not self._apply_quantity(denomination, quantity):
+            return False
+        if denomination in self.weights:
+            self.weights[denomination], _ = self.calculate_coin_from_quantity(denomination, quantity)
+            self.changes.add(('weight', denomination))
+        return True
+
+    def set_weight(self, denomination, weight, typed=True):
+        """Sets a weighed amount of coins in mg; the quantity follows from the unit weight.
+
+        A weight that was not typed (e.g. read from the scale) is also
+        reported as changed, so the view shows it.
+        """
+        if weight == self.weights[denomination]:
+            return False
+        self.weights[denomination] = weight
+        if not typed:
+            self.changes.add(('weight', denomination))
+        quantity, _ = self.calculate_coin_from_weight(denomination, weight)
+        if self._apply_quantity(denomination, quantity):
+            self.changes.add(('quantity', denomination))
+        return True
+
+    def _apply_quantity(self, denomination, quantity):
+        old = self.quantities[denomination]
+        if quantity == old:
+            return False
+        self.quantities[denomination] = quantity
+        group = 'bills' if denomination in self.bill_set else 'coins'
+        self.totals[group] += (quantity - old) * denomination
+        self.revision += 1
+        self.changes.update((('subtotal', denomination), ('total', group), ('total', 'general')))
+        return True
+
+    def reset(self):
+        """Zeroes every count; all values are reported as changed."""
+        self.quantities = dict.fromkeys(self.denominations, 0)
+        self.weights = dict.fromkeys(self.coins_weight, 0)
+        self.totals = {'bills': 0, 'coins': 0}
+        self.revision += 1
+        self.changes.update(('quantity', d) for d in self.denominations)
+        self.changes.update(('subtotal', d) for d in self.denominations)
+        self.changes.update(('weight', d) for d in self.weights)
+        self.changes.update((('total', 'bills'), ('total', 'coins'), ('total', 'general')))
+
+    def take_changes(self):
+        """Returns the keys changed since the last call and clears them."""
+        changes, self.changes = self.changes, set()
+        return changes
+
     def calculate_bill_subtotal(self, denomination, quantity):
         return denomination * quantity
-        
+
     def calculate_coin_from_weight(self, denomination, weight):
+        """Returns (quantity, pesos) for a weight in mg."""
         if denomination not in self.coins_weight:
             return 0, 0
-            
+
         unit_weight = self.coins_weight[denomination]
         if unit_weight <= 0:
             return 0, 0
-            
-        quantity = round(weight / unit_weight)
+
+        quantity = coins_from_weight(weight, unit_weight)
         total_value = quantity * denomination
         return quantity, total_value
-        
+
     def calculate_coin_from_quantity(self, denomination, quantity):
+        """Returns (weight in mg, pesos) for a number of coins."""
         total_value = quantity * denomination
-        
+
         weight = 0
         if denomination in self.coins_weight:
             weight = quantity * self.coins_weight[denomination]
-            
+
         return weight, total_value
+
+    def drawer_totals(self, drawers):
+        """
+        Totals of many drawers counted elsewhere (e.g. the ledger or other registers).
+
+        Args:
+            drawers: {denomination: quantity} dicts or rows in `denominations` order
+        """
+        rows = [
+            [drawer.get(d, 0) for d in self.denominations] if isinstance(drawer, dict) else drawer
+            for drawer in drawers
+        ]
+        return drawer_totals(rows, self.currency.values)
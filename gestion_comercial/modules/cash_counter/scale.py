@@ -0,0 +1,270 @@
+"""
+Serial scale reader for weighing coins.
+
+A background thread reads the scale's continuous output, parses each
+line (SICS 'S S  75.70 g', A&D 'ST,+00075.70 g' or a bare number with a
+unit) into milligrams, smooths the readings and reports a weight once
+it has settled.
+The UI only ever sees the latest settled weight, so a scale sending
+dozens of lines a second cannot back it up.
+
+pyserial is used when installed; otherwise the port is opened as a
+plain terminal device, which covers USB-serial adapters on Linux/macOS
+and the pseudo-terminal of tools/scale_simulator.py.
+"""
+import os
+import re
+import threading
+import time
+from collections import deque
+
+try:
+    import serial
+except ImportError:  # pyserial is optional
+    serial = None
+
+DEFAULT_BAUDRATE = 9600
+READ_SIZE = 4096
+READ_TIMEOUT = 0.2
+STABLE_SAMPLES = 5
+STABLE_TOLERANCE = 200  # mg; well under the weight of the lightest coin
+MAX_LINE = 256
+
+# Milligrams per unit
+UNITS = {'kg': 1000000, 'g': 1000, 'mg': 1, 'lb': 453592.37, 'oz': 28349.523125}
+# SICS (Mettler Toledo and most Ohaus): 'S S     75.70 g', 'S D     75.71 g'
+SICS_PATTERN = re.compile(r'^S\s+([SD])\s+([-+]?\d+(?:\.\d+)?)\s*([a-z]+)$', re.IGNORECASE)
+# A&D and many Chinese indicators: 'ST,+00075.70  g', 'US,GS,+0.0757kg'
+HEADER_PATTERN = re.compile(r'^(ST|US|OL)(?:,(?:GS|NT|TR))?,\s*([-+]?\s*\d+(?:\.\d+)?)\s*([a-z]+)$', re.IGNORECASE)
+# Bare reading: '  75.70 g', '+0.0757 kg'
+PLAIN_PATTERN = re.compile(r'^([-+]?\s*\d+(?:\.\d+)?)\s*([a-z]+)?$', re.IGNORECASE)
+
+
+class ScaleError(Exception):
+    pass
+
+
+class Reading:
+    """One parsed line: weight in integer mg and the scale's own stability flag (None if it has none)."""
+
+    __slots__ = ('weight', 'stable')
+
+    def __init__(self, weight, stable=None):
+        self.weight = weight
+        self.stable = stable
+
+    def __repr__(self):
+        return f"Reading({self.weight!r}, stable={self.stable!r})"
+
+
+def _to_mg(number, unit):
+    factor = UNITS.get((unit or 'g').lower())
+    if factor is None:
+        return None
+    return round(float(number.replace(' ', '')) * factor)
+
+
+def parse_line(line):
+    """
+    Parses one line of scale output.
+
+    Returns:
+        Reading: or None for lines that are not a weight (overload, prompts, noise)
+    """
+    line = line.strip()
+    if not line or len(line) > MAX_LINE:
+        return None
+
+    match = SICS_PATTERN.match(line)
+    if match:
+        weight = _to_mg(match.group(2), match.group(3))
+        return None if weight is None else Reading(weight, match.group(1).upper() == 'S')
+
+    match = HEADER_PATTERN.match(line)
+    if match:
+        header = match.group(1).upper()
+        if header == 'OL':
+            return None
+        weight = _to_mg(match.group(2), match.group(3))
+        return None if weight is None else Reading(weight, header == 'ST')
+
+    match = PLAIN_PATTERN.match(line)
+    if match:
+        weight = _to_mg(match.group(1), match.group(2))
+        return None if weight is None else Reading(weight)
+    return None
+
+
+class StabilityFilter:
+    """
+    Settles noisy readings.
+
+    A weight is settled when the last STABLE_SAMPLES readings agree within
+    the tolerance and the scale did not flag any of them as moving. The
+    settled value is their mean, and it is reported once until the load
+    changes. An empty pan is never reported, so lifting the coins off does
+    not wipe the count that was just weighed.
+    """
+
+    def __init__(self, samples=STABLE_SAMPLES, tolerance=STABLE_TOLERANCE):
+        self.window = deque(maxlen=samples)
+        self.tolerance = tolerance
+        self.reported = None
+
+    def add(self, reading):
+        """Returns the settled weight when this reading settles the load, else None."""
+        if reading.stable is False:
+            self.window.clear()
+            return None
+        self.window.append(reading.weight)
+        if len(self.window) < self.window.maxlen:
+            return None
+        if max(self.window) - min(self.window) > self.tolerance:
+            return None
+
+        weight = (2 * sum(self.window) + len(self.window)) // (2 * len(self.window))
+        if abs(weight) <= self.tolerance:
+            self.reported = None  # the same load put back is reported again
+            return None
+        if self.reported is not None and abs(weight - self.reported) <= self.tolerance:
+            return None
+        self.reported = weight
+        return weight
+
+
+class TerminalPort:
+    """Serial device opened without pyserial (POSIX only), in raw mode."""
+
+    def __init__(self, path, baudrate=DEFAULT_BAUDRATE):
+        import termios
+        import tty
+        self.fd = os.open(path, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+        try:
+            tty.setraw(self.fd)
+            attributes = termios.tcgetattr(self.fd)
+            speed = getattr(termios, f'B{baudrate}', termios.B9600)
+            attributes[4] = attributes[5] = speed
+            termios.tcsetattr(self.fd, termios.TCSANOW, attributes)
+        except termios.error:
+            pass  # not a terminal (e.g. a FIFO); read it as is
+
+    def read(self, size):
+        import select
+        ready, _, _ = select.select([self.fd], [], [], READ_TIMEOUT)
+        if not ready:
+            return b''
+        try:
+            return os.read(self.fd, size)
+        except BlockingIOError:
+            return b''
+
+    def close(self):
+        os.close(self.fd)
+
+
+def open_port(port, baudrate=DEFAULT_BAUDRATE):
+    """Opens a scale port with pyserial when available, else as a terminal device."""
+    if serial is not None:
+        try:
+            return serial.Serial(port, baudrate, timeout=READ_TIMEOUT)
+        except serial.SerialException as e:
+            raise ScaleError(f"No se pudo abrir la balanza en {port}: {e}")
+    if os.name != 'posix':
+        raise ScaleError("Para usar la balanza instale pyserial (pip install pyserial).")
+    try:
+        return TerminalPort(port, baudrate)
+    except OSError as e:
+        raise ScaleError(f"No se pudo abrir la balanza en {port}: {e}")
+
+
+class ScaleReader:
+    """
+    Reads a scale on a background thread.
+
+    The thread keeps only the newest values: `latest` (last reading, for a
+    live display) and the last settled weight, which take_settled()
+    hands out once. Nothing queues up, whatever the scale's output rate.
+    """
+
+    def __init__(self, port, baudrate=DEFAULT_BAUDRATE, stability=None):
+        self.port = port
+        self.baudrate = baudrate
+        self.stability = stability or StabilityFilter()
+        self.lock = threading.Lock()
+        self.latest = None
+        self.settled = None
+        self.error = None
+        self.stats = {'lines': 0, 'readings': 0, 'settled': 0, 'bytes': 0}
+        self.started = None
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        """Opens the port and starts reading; raises ScaleError if it cannot be opened."""
+        if self.running:
+            return
+        self.connection = open_port(self.port, self.baudrate)
+        self.running = True
+        self.started = time.perf_counter()
+        self.thread = threading.Thread(target=self._run, name='scale-reader', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(READ_TIMEOUT * 5)
+            self.thread = None
+
+    def take_settled(self):
+        """Returns the weight settled since the last call, or None."""
+        with self.lock:
+            weight, self.settled = self.settled, None
+        return weight
+
+    def metrics(self):
+        """Counters plus lines/second since start."""
+        with self.lock:
+            stats = dict(self.stats)
+        seconds = time.perf_counter() - self.started if self.started else 0
+        stats['lines_per_second'] = stats['lines'] / seconds if seconds else 0.0
+        return stats
+
+    def _run(self):
+        buffer = b''
+        try:
+            while self.running:
+                data = self.connection.read(READ_SIZE)
+                if not data:
+                    continue
+                buffer += data
+                # Scales end lines with CR LF, CR or LF
+                lines = re.split(rb'\r\n|\r|\n', buffer)
+                buffer = lines.pop()[-MAX_LINE:]
+                self._handle_lines(lines, len(data))
+        except Exception as e:  # OSError, or pyserial's SerialException
+            self.error = str(e)
+        finally:
+            self.running = False
+            self.connection.close()
+
+    def _handle_lines(self, lines, size):
+        latest = settled = None
+        readings = 0
+        for line in lines:
+            reading = parse_line(line.decode('ascii', 'replace'))
+            if reading is None:
+                continue
+            readings += 1
+            latest = reading
+            weight = self.stability.add(reading)
+            if weight is not None:
+                settled = weight
+        with self.lock:
+            self.stats['lines'] += len(lines)
+            self.stats['readings'] += readings
+            self.stats['bytes'] += size
+            if latest is not None:
+                self.latest = latest
+            if settled is not None:
+                self.settled = settled
+                self.stats['settled'] += 1
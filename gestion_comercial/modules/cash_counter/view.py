@@ -1,6 +1,16 @@
 import tkinter as tk
+from tkinter import messagebox
 from gestion_comercial.config.theme import Theme
+from gestion_comercial.config.settings import Settings
 from gestion_comercial.modules.cash_counter.model import CashCounterModel
+from gestion_comercial.modules.cash_counter.ledger import CashLedger, current_shift
+from gestion_comercial.modules.cash_counter.scale import ScaleReader, ScaleError
+from gestion_comercial.modules.cash_counter.fixedpoint import parse_grams, format_grams
+
+SUBTITLE = "Gestiona billetes y monedas"
+COINS_TITLE = "🪙 MONEDAS"
+SAVED_NOTICE_MS = 4000
+SCALE_POLL_MS = 100
 
 class CashCounterView(tk.Frame):
     def __init__(self, parent, navigator):
@@ -13,10 +23,21 @@ class CashCounterView(tk.Frame):
         self.entries_coins_weight = {}
         self.entries_coins_qty = {}
         self.labels_coins_value = {}
-        
-        self.calculating = {}
-        
+
+        # Pending after_idle refresh; keystrokes before it runs share it
+        self.refresh_id = None
+        self.ledger = CashLedger.default()
+        self.saved_revision = self.model.revision
+        self.notice_id = None
+
+        # Settled scale weights go to the last focused weight entry
+        # (none when the currency has no coins counted by weight)
+        self.scale = None
+        self.scale_poll_id = None
+        self.scale_target = max(self.model.coins_weight, default=None)
+
         self.setup_ui()
+        self.start_scale()
         
     def setup_ui(self):
         # Top green accent strip
@@ -74,14 +95,15 @@ class CashCounterView(tk.Frame):
             fg='white'
         ).pack(pady=(0, 5))
 
-        # Subtitle matching launcher style
-        tk.Label(
+        # Subtitle matching launcher style; also shows the save notice
+        self.subtitle_label = tk.Label(
             content_container,
-            text="Gestiona billetes y monedas",
+            text=SUBTITLE,
             font=(Theme.FONT_FAMILY, 11),
             bg=Theme.TEXT_PRIMARY,
             fg='#b4bcc4'
-        ).pack()
+        )
+        self.subtitle_label.pack()
         
     def create_bills_section(self, parent):
         frame = tk.LabelFrame(
@@ -107,29 +129,15 @@ class CashCounterView(tk.Frame):
         self.create_total_row(frame, len(self.model.bills) + 1, "Total Billetes:", "total_bills")
 
     def create_bill_row(self, parent, denom, row):
-        # Get bill color and width based on denomination (proportional to real bill sizes)
-        bill_colors = {
-            20000: '#FF6B35',  # Orange
-            10000: '#4A90E2',  # Blue
-            5000: '#E63946',   # Red
-            2000: '#9B59B6',   # Purple
-            1000: '#2ECC71'    # Green
-        }
-        # Widths proportional to real Chilean bill sizes
-        bill_widths = {
-            20000: 14,  # Longest
-            10000: 13,
-            5000: 12,
-            2000: 11,
-            1000: 10    # Shortest
-        }
-        bill_color = bill_colors.get(denom, Theme.BILLS_FG)
-        bill_width = bill_widths.get(denom, 12)
+        # Color and width (proportional to the real bill size) from the currency profile
+        currency = self.model.currency
+        bill_color = currency.color(denom, Theme.BILLS_FG)
+        bill_width = currency.width(denom)
 
         # Label with bill color
         lbl_denom = tk.Label(
             parent,
-            text=f"${self.format_number(denom)}",
+            text=self.model.currency.format_amount(denom),
             font=(Theme.FONT_FAMILY, 11, 'bold'),
             bg=bill_color,
             fg='white',
@@ -148,20 +156,21 @@ class CashCounterView(tk.Frame):
 
         self.entries_bills[denom] = entry
 
-        lbl_sub = tk.Label(parent, text="$0", font=Theme.FONTS['body'], bg=Theme.BILLS_BG, width=15)
+        lbl_sub = tk.Label(parent, text=self.model.currency.format_amount(0), font=Theme.FONTS['body'], bg=Theme.BILLS_BG, width=15)
         lbl_sub.grid(row=row, column=2)
         self.subtotals_bills[denom] = lbl_sub
 
     def create_coins_section(self, parent):
         frame = tk.LabelFrame(
             parent,
-            text="🪙 MONEDAS",
+            text=COINS_TITLE,
             font=Theme.FONTS['h3'],
             bg=Theme.COINS_BG,
             fg=Theme.COINS_FG,
             padx=10, pady=5
         )
         frame.pack(fill='x', pady=(0, 5))
+        self.coins_frame = frame
         
         # Headers
         headers = [("Denominación", 0, 12), ("Peso (g)", 1, 10), ("Cantidad", 2, 10), ("Valor", 3, 12)]
@@ -169,10 +178,11 @@ class CashCounterView(tk.Frame):
             tk.Label(frame, text=text, font=Theme.FONTS['body_bold'], bg=Theme.COINS_BG, width=width).grid(row=0, column=col, padx=5, pady=2)
             
         row = 1
-        # 500 (Qty only)
-        self.create_coin_qty_row(frame, 500, row)
-        row += 1
-        
+        # Coins counted by quantity only
+        for denom in self.model.coins_qty:
+            self.create_coin_qty_row(frame, denom, row)
+            row += 1
+
         # Weighted coins
         for denom in sorted(self.model.coins_weight.keys(), reverse=True):
             self.create_coin_weight_row(frame, denom, row)
@@ -182,30 +192,24 @@ class CashCounterView(tk.Frame):
         self.create_total_row(frame, row, "Total Monedas:", "total_coins", col_offset=1)
 
     def create_coin_qty_row(self, parent, denom, row):
-        # Get coin color based on denomination
-        coin_colors = {
-            500: '#8B8B8B',   # Gray (plomo claro)
-            100: '#F4C430',   # Yellow (amarillo)
-            50: '#A67C52',    # Light brown (café claro)
-            10: '#FFD700'     # Bright gold/yellow (amarillo brillante)
-        }
-        coin_color = coin_colors.get(denom, Theme.COINS_FG)
+        currency = self.model.currency
+        coin_color = currency.color(denom, Theme.COINS_FG)
 
         # Label with coin color (all with white text)
         lbl_denom = tk.Label(
             parent,
-            text=f"${denom}",
+            text=currency.format_amount(denom),
             font=(Theme.FONT_FAMILY, 11, 'bold'),
             bg=coin_color,
             fg='white',
             padx=10,
             pady=3,
             anchor='w',
-            width=12
+            width=currency.width(denom)
         )
         lbl_denom.grid(row=row, column=0, padx=5, pady=2, sticky='w')
 
-        # Empty space for peso column (no weight for 500 peso coin)
+        # Empty space for peso column (no unit weight for this coin)
         tk.Label(parent, text="", font=Theme.FONTS['body'], bg=Theme.COINS_BG).grid(row=row, column=1, pady=2)
 
         entry = tk.Entry(parent, width=10, font=Theme.FONTS['body'], justify='center', bg=Theme.ENTRY_BG)
@@ -216,31 +220,25 @@ class CashCounterView(tk.Frame):
         
         self.entries_coins_qty[denom] = entry
         
-        lbl_val = tk.Label(parent, text="$0", font=Theme.FONTS['body'], bg=Theme.COINS_BG)
+        lbl_val = tk.Label(parent, text=self.model.currency.format_amount(0), font=Theme.FONTS['body'], bg=Theme.COINS_BG)
         lbl_val.grid(row=row, column=3, pady=2)
         self.labels_coins_value[denom] = lbl_val
 
     def create_coin_weight_row(self, parent, denom, row):
-        # Get coin color based on denomination
-        coin_colors = {
-            500: '#8B8B8B',   # Gray (plomo claro)
-            100: '#F4C430',   # Yellow (amarillo)
-            50: '#A67C52',    # Light brown (café claro)
-            10: '#FFD700'     # Bright gold/yellow (amarillo brillante)
-        }
-        coin_color = coin_colors.get(denom, Theme.COINS_FG)
+        currency = self.model.currency
+        coin_color = currency.color(denom, Theme.COINS_FG)
 
         # Label with coin color (all with white text)
         lbl_denom = tk.Label(
             parent,
-            text=f"${denom}",
+            text=currency.format_amount(denom),
             font=(Theme.FONT_FAMILY, 11, 'bold'),
             bg=coin_color,
             fg='white',
             padx=10,
             pady=3,
             anchor='w',
-            width=12
+            width=currency.width(denom)
         )
         lbl_denom.grid(row=row, column=0, padx=5, pady=2, sticky='w')
 
@@ -248,7 +246,7 @@ class CashCounterView(tk.Frame):
         entry_w.grid(row=row, column=1, padx=5, pady=2)
         entry_w.insert(0, "0")
         entry_w.bind('<KeyRelease>', lambda e, d=denom: self.on_coin_weight_change(d))
-        entry_w.bind('<FocusIn>', self.on_focus_in)
+        entry_w.bind('<FocusIn>', lambda e, d=denom: self.on_weight_focus_in(e, d))
         self.entries_coins_weight[denom] = entry_w
 
         entry_q = tk.Entry(parent, width=10, font=Theme.FONTS['body'], justify='center', bg=Theme.ENTRY_BG)
@@ -258,13 +256,13 @@ class CashCounterView(tk.Frame):
         entry_q.bind('<FocusIn>', self.on_focus_in)
         self.entries_coins_qty[denom] = entry_q
         
-        lbl_val = tk.Label(parent, text="$0", font=Theme.FONTS['body'], bg=Theme.COINS_BG)
+        lbl_val = tk.Label(parent, text=self.model.currency.format_amount(0), font=Theme.FONTS['body'], bg=Theme.COINS_BG)
         lbl_val.grid(row=row, column=3, pady=2)
         self.labels_coins_value[denom] = lbl_val
 
     def create_total_row(self, parent, row, text, attr_name, col_offset=0):
         tk.Label(parent, text=text, font=Theme.FONTS['h3'], bg=parent['bg']).grid(row=row, column=1+col_offset, pady=3)
-        lbl = tk.Label(parent, text="$0", font=Theme.FONTS['h3'], fg=parent['fg'], bg=parent['bg'])
+        lbl = tk.Label(parent, text=self.model.currency.format_amount(0), font=Theme.FONTS['h3'], fg=parent['fg'], bg=parent['bg'])
         lbl.grid(row=row, column=2+col_offset, pady=3)
         setattr(self, attr_name, lbl)
 
@@ -281,7 +279,7 @@ class CashCounterView(tk.Frame):
         
         self.total_general = tk.Label(
             frame,
-            text="$0",
+            text=self.model.currency.format_amount(0),
             font=Theme.FONTS['total_large'],
             fg=Theme.TOTAL_TEXT,
             bg=Theme.TOTAL_BG
@@ -296,11 +294,20 @@ class CashCounterView(tk.Frame):
         self.create_styled_button(
             frame,
             text="⬅ Volver",
-            command=lambda: self.navigator.show_view('launcher'),
+            command=self.go_back,
             bg_color=Theme.TOTAL_FG,
             hover_color='#0d47a1'
         )
 
+        # Save Button (Green theme)
+        self.create_styled_button(
+            frame,
+            text="💾 Guardar",
+            command=self.save_count,
+            bg_color='#2ecc71',
+            hover_color='#27ae60'
+        )
+
         # Clear Button (Gray theme)
         self.create_styled_button(
             frame,
@@ -344,77 +351,155 @@ class CashCounterView(tk.Frame):
         if event.widget.get() == "0":
             event.widget.delete(0, tk.END)
 
+    def on_weight_focus_in(self, event, denom):
+        self.scale_target = denom
+        self.on_focus_in(event)
+
     def on_bill_change(self, denom):
-        try:
-            qty = int(self.entries_bills[denom].get() or 0)
-            subtotal = self.model.calculate_bill_subtotal(denom, qty)
-            self.subtotals_bills[denom].config(text=f"${self.format_number(subtotal)}")
-        except ValueError:
-            self.subtotals_bills[denom].config(text="$0")
-        self.calculate_totals()
+        self.model.set_quantity(denom, self.read_quantity(self.entries_bills[denom]))
+        self.schedule_refresh()
 
     def on_coin_weight_change(self, denom):
-        if self.calculating.get(denom): return
-        
-        try:
-            weight = float(self.entries_coins_weight[denom].get() or 0)
-            qty, val = self.model.calculate_coin_from_weight(denom, weight)
-            
-            self.calculating[denom] = True
-            self.entries_coins_qty[denom].delete(0, tk.END)
-            self.entries_coins_qty[denom].insert(0, str(qty))
-            self.calculating[denom] = False
-            
-            self.labels_coins_value[denom].config(text=f"${self.format_number(val)}")
-        except ValueError:
-            pass
-        self.calculate_totals()
+        weight = parse_grams(self.entries_coins_weight[denom].get())
+        if weight is None:
+            return
+        self.model.set_weight(denom, weight)
+        self.schedule_refresh()
 
     def on_coin_qty_change(self, denom):
-        if self.calculating.get(denom): return
-        
+        self.model.set_quantity(denom, self.read_quantity(self.entries_coins_qty[denom]))
+        self.schedule_refresh()
+
+    @staticmethod
+    def read_quantity(entry):
+        """Quantity typed in an entry; anything that is not a number counts as 0."""
         try:
-            qty = int(self.entries_coins_qty[denom].get() or 0)
-            weight, val = self.model.calculate_coin_from_quantity(denom, qty)
-            
-            if denom in self.entries_coins_weight:
-                self.calculating[denom] = True
-                self.entries_coins_weight[denom].delete(0, tk.END)
-                self.entries_coins_weight[denom].insert(0, f"{weight:.3f}")
-                self.calculating[denom] = False
-                
-            self.labels_coins_value[denom].config(text=f"${self.format_number(val)}")
+            return int(entry.get() or 0)
         except ValueError:
-            pass
-        self.calculate_totals()
-
-    def calculate_totals(self):
-        total_bills = 0
-        for denom, entry in self.entries_bills.items():
-            try:
-                total_bills += int(entry.get() or 0) * denom
-            except ValueError: pass
-            
-        total_coins = 0
-        for denom, entry in self.entries_coins_qty.items():
-            try:
-                total_coins += int(entry.get() or 0) * denom
-            except ValueError: pass
-            
-        self.total_bills.config(text=f"${self.format_number(total_bills)}")
-        self.total_coins.config(text=f"${self.format_number(total_coins)}")
-        self.total_general.config(text=f"${self.format_number(total_bills + total_coins)}")
+            return 0
+
+    def schedule_refresh(self):
+        if self.refresh_id is None:
+            self.refresh_id = self.after_idle(self.refresh)
+
+    def refresh(self):
+        """Updates only the widgets whose values changed in the model."""
+        self.refresh_id = None
+        model = self.model
+        for kind, key in model.take_changes():
+            if kind == 'subtotal':
+                label = self.subtotals_bills[key] if key in self.subtotals_bills else self.labels_coins_value[key]
+                label.config(text=model.currency.format_amount(model.subtotal(key)))
+            elif kind == 'quantity':
+                entry = self.entries_bills[key] if key in self.entries_bills else self.entries_coins_qty[key]
+                self.set_entry(entry, str(model.quantities[key]))
+            elif kind == 'weight':
+                weight = model.weights[key]
+                self.set_entry(self.entries_coins_weight[key], format_grams(weight) if weight else "0")
+            elif key == 'general':
+                self.total_general.config(text=model.currency.format_amount(model.total))
+            else:
+                label = self.total_bills if key == 'bills' else self.total_coins
+                label.config(text=model.currency.format_amount(model.totals[key]))
+
+    @staticmethod
+    def set_entry(entry, text):
+        if entry.get() != text:
+            entry.delete(0, tk.END)
+            entry.insert(0, text)
+
+    def save_count(self):
+        """
+        Appends the current count to the ledger; the write happens in the
+        background. A later save of the same shift supersedes this one.
+        """
+        model = self.model
+        if not model.total or model.revision == self.saved_revision:
+            return
+        shift = current_shift()
+        self.ledger.record(Settings.CASH_REGISTER, model, shift)
+        self.saved_revision = model.revision
+        self.subtitle_label.config(
+            text=f"Conteo guardado · {Settings.CASH_REGISTER}, turno {shift} · {model.currency.format_amount(model.total)}"
+        )
+        if self.notice_id is not None:
+            self.after_cancel(self.notice_id)
+        self.notice_id = self.after(SAVED_NOTICE_MS, self.clear_notice)
+
+    def start_scale(self):
+        if not Settings.SCALE_PORT or self.scale_target is None:
+            return
+        self.scale = ScaleReader(Settings.SCALE_PORT, Settings.SCALE_BAUDRATE)
+        try:
+            self.scale.start()
+        except ScaleError as e:
+            self.scale = None
+            self.coins_frame.config(text=f"{COINS_TITLE} · {e}")
+            return
+        self.scale_poll_id = self.after(SCALE_POLL_MS, self.poll_scale)
+
+    def poll_scale(self):
+        """Takes the latest settled weight; readings in between were already merged by the reader."""
+        self.scale_poll_id = None
+        scale = self.scale
+        weight = scale.take_settled()
+        if weight is not None:
+            self.model.set_weight(self.scale_target, weight, typed=False)
+            self.schedule_refresh()
+
+        if scale.error:
+            title = f"{COINS_TITLE} · balanza desconectada"
+        elif scale.latest is not None:
+            title = f"{COINS_TITLE} · balanza {self.model.currency.format_amount(self.scale_target)}: {format_grams(scale.latest.weight)} g"
+        else:
+            title = COINS_TITLE
+        if self.coins_frame.cget('text') != title:
+            self.coins_frame.config(text=title)
+
+        if not scale.error:
+            self.scale_poll_id = self.after(SCALE_POLL_MS, self.poll_scale)
+
+    def clear_notice(self):
+        self.notice_id = None
+        self.subtitle_label.config(text=SUBTITLE)
+
+    def confirm_unsaved(self, title):
+        """
+        Asks whether to save an unsaved count before it is discarded.
+
+        Returns:
+            bool: False if the user cancelled
+        """
+        model = self.model
+        if not model.total or model.revision == self.saved_revision:
+            return True
+        answer = messagebox.askyesnocancel(
+            title,
+            f"El conteo actual ({model.currency.format_amount(model.total)}) no está guardado.\n\n"
+            "¿Desea guardarlo en el registro de caja?"
+        )
+        if answer is None:
+            return False
+        if answer:
+            self.save_count()
+        return True
+
+    def go_back(self):
+        if self.confirm_unsaved("Volver"):
+            self.navigator.show_view('launcher')
 
     def clear_all(self):
-        for e in self.entries_bills.values():
-            e.delete(0, tk.END); e.insert(0, "0")
-        for e in self.entries_coins_qty.values():
-            e.delete(0, tk.END); e.insert(0, "0")
-        for e in self.entries_coins_weight.values():
-            e.delete(0, tk.END); e.insert(0, "0")
-        for l in self.subtotals_bills.values(): l.config(text="$0")
-        for l in self.labels_coins_value.values(): l.config(text="$0")
-        self.calculate_totals()
-
-    def format_number(self, num):
-        return f"{int(num):,}".replace(",", ".")
+        if not self.confirm_unsaved("Limpiar"):
+            return
+        self.model.reset()
+        self.saved_revision = self.model.revision
+        self.refresh()
+
+    def destroy(self):
+        for after_id in (self.refresh_id, self.notice_id, self.scale_poll_id):
+            if after_id is not None:
+                self.after_cancel(after_id)
+        self.refresh_id = self.notice_id = self.scale_poll_id = None
+        if self.scale is not None:
+            self.scale.stop()
+        super().destroy()
@@ -0,0 +1,463 @@
+"""
+Local HTTP API for tag generation.
+
+Lets the POS and back-office scripts request tag documents without the
+Tk view. The server runs on asyncio; parsing and rendering happen on a
+thread pool and the document is sent with chunked transfer encoding as
+it is written, so large catalogs start arriving right away and other
+requests are not blocked meanwhile.
+
+    POST /tags?format=pdf&layout=standard_2x7
+        Body: JSON (a list of products or {"products": [...]}) or CSV
+        with the same columns accepted by the importer.
+        Response: the document; X-Labels and X-Rejected-Rows headers
+        report the import.
+    GET /metrics
+        Request counters, throughput and latency percentiles as JSON.
+
+Run it standalone with `python -m gestion_comercial.modules.tag_manager.api [port]`.
+"""
+import asyncio
+import json
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+from gestion_comercial.config.settings import Settings
+from gestion_comercial.modules.tag_manager.model import TagManagerModel, OUTPUT_FORMATS
+from gestion_comercial.modules.tag_manager.layouts import LAYOUT_PROFILES, DEFAULT_LAYOUT
+from gestion_comercial.modules.tag_manager.packing import MIXED_LAYOUT
+from gestion_comercial.modules.tag_manager.importer import CatalogImporter
+from gestion_comercial.modules.tag_manager.batch import ProductBatch
+
+DEFAULT_PORT = 8765
+API_WORKERS = 4
+MAX_BODY_BYTES = 64 * 1024 * 1024
+MAX_HEADERS = 100
+STREAM_CHUNK_BYTES = 64 * 1024
+STREAM_QUEUE_CHUNKS = 8  # chunks buffered ahead of a slow client
+IDLE_TIMEOUT = 30  # seconds a kept-alive connection may stay silent
+LATENCY_SAMPLES = 1000
+
+CONTENT_TYPES = {
+    'html': 'text/html; charset=utf-8',
+    'pdf': 'application/pdf',
+    'zpl': 'text/plain; charset=utf-8',
+    'escpos': 'application/octet-stream',
+}
+REASONS = {
+    200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    411: 'Length Required', 413: 'Payload Too Large', 422: 'Unprocessable Entity',
+    500: 'Internal Server Error',
+}
+
+
+class ApiError(Exception):
+    """Request error reported to the client with an HTTP status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Request:
+    __slots__ = ('method', 'path', 'query', 'headers', 'body')
+
+    def __init__(self, method, target, headers, body):
+        url = urlsplit(target)
+        self.method = method
+        self.path = url.path.rstrip('/') or '/'
+        self.query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        self.headers = headers
+        self.body = body
+
+    @property
+    def keep_alive(self):
+        return self.headers.get('connection', '').lower() != 'close'
+
+
+class ChunkStream:
+    """
+    File-like sink for the document writers, used from a worker thread.
+
+    Writes are buffered into STREAM_CHUNK_BYTES chunks and handed to the
+    event loop through a bounded queue, so a slow client slows the writer
+    down instead of piling the document up in memory.
+    """
+
+    def __init__(self, loop, queue):
+        self.loop = loop
+        self.queue = queue
+        self.buffer = []
+        self.size = 0
+        self.cancelled = False
+
+    def write(self, data):
+        if self.cancelled:
+            raise ConnectionAbortedError("El cliente cerró la conexión.")
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self.buffer.append(data)
+        self.size += len(data)
+        if self.size >= STREAM_CHUNK_BYTES:
+            self.flush()
+        return len(data)
+
+    def flush(self):
+        if self.buffer:
+            chunk = b''.join(self.buffer)
+            self.buffer = []
+            self.size = 0
+            self._put(chunk)
+
+    def close(self):
+        """Sends what is left and marks the end of the document."""
+        if self.cancelled:
+            return  # nobody reads the queue any more
+        self.flush()
+        self._put(None)
+
+    def _put(self, item):
+        if self.loop.is_closed():
+            raise ConnectionAbortedError("El servidor se cerró.")
+        # A client that takes longer than IDLE_TIMEOUT per chunk is treated as gone
+        asyncio.run_coroutine_threadsafe(self.queue.put(item), self.loop).result(IDLE_TIMEOUT)
+
+
+class ApiMetrics:
+    """Counters and recent latencies; only touched from the event loop."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stats = {'requests': 0, 'errors': 0, 'active': 0, 'labels': 0, 'bytes': 0}
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.first_bytes = deque(maxlen=LATENCY_SAMPLES)
+
+    def begin(self):
+        self.stats['active'] += 1
+        return time.perf_counter()
+
+    def finish(self, start, status, labels=0, size=0, first_byte=None):
+        stats = self.stats
+        stats['active'] -= 1
+        stats['requests'] += 1
+        if status >= 400:
+            stats['errors'] += 1
+        stats['labels'] += labels
+        stats['bytes'] += size
+        now = time.perf_counter()
+        self.latencies.append(now - start)
+        if first_byte is not None:
+            self.first_bytes.append(first_byte - start)
+
+    def snapshot(self):
+        """Returns the counters plus per-second rates and latency percentiles in ms."""
+        stats = dict(self.stats)
+        uptime = time.perf_counter() - self.started
+        stats['uptime_seconds'] = round(uptime, 1)
+        stats['requests_per_second'] = stats['requests'] / uptime
+        stats['labels_per_second'] = stats['labels'] / uptime
+        stats['bytes_per_second'] = stats['bytes'] / uptime
+        for name, samples in (('latency', self.latencies), ('first_byte', self.first_bytes)):
+            ordered = sorted(samples)
+            for percentile in (50, 95, 99):
+                value = ordered[min(len(ordered) - 1, len(ordered) * percentile // 100)] if ordered else 0.0
+                stats[f'{name}_p{percentile}_ms'] = round(value * 1000, 2)
+        return stats
+
+
+def parse_products(body, content_type):
+    """
+    Reads a JSON or CSV request body with the catalog importer rules.
+
+    Returns:
+        tuple: (ProductBatch, CatalogImporter with the import summary)
+    """
+    importer = CatalogImporter()
+    if 'json' in content_type or body.lstrip()[:1] in (b'[', b'{'):
+        try:
+            data = json.loads(body)
+        except (ValueError, UnicodeDecodeError) as e:
+            raise ApiError(400, f"JSON inválido: {e}")
+        if isinstance(data, dict):
+            data = data.get('products', data.get('productos'))
+        if not isinstance(data, list):
+            raise ApiError(400, "Se esperaba una lista de productos.")
+        chunks = importer.iter_chunks_from_records(data)
+    else:
+        try:
+            text = body.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            text = body.decode('cp1252', 'replace')
+        chunks = importer.iter_chunks_from_lines(text.splitlines(keepends=True))
+
+    products = ProductBatch()
+    for chunk in chunks:
+        for product in chunk:
+            products.append(product.name, product.price,
+                            sku=product.sku, barcode=product.barcode, size=product.size)
+    return products, importer
+
+
+class TagApiServer:
+    """asyncio HTTP server around TagManagerModel."""
+
+    def __init__(self, host=None, port=None, workers=API_WORKERS):
+        self.host = host or Settings.TAG_API_HOST
+        self.port = DEFAULT_PORT if port is None else port
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='tag-api')
+        self.metrics = ApiMetrics()
+        self.loop = None
+        self.server = None
+        self.writers = set()  # open client connections
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.server
+
+    async def serve_forever(self):
+        """Serves until close(); the caller then awaits shutdown()."""
+        if self.server is None:
+            await self.start()
+        await self.server.serve_forever()
+
+    async def shutdown(self):
+        """Closes the listener and the client connections, then ends the remaining tasks."""
+        self.server.close()
+        for writer in list(self.writers):
+            writer.close()
+        await self.server.wait_closed()
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def close(self):
+        """Stops accepting connections, which ends serve_forever(); safe to call from any thread."""
+        if self.server is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.server.close)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    # Connections
+    async def handle_connection(self, reader, writer):
+        self.writers.add(writer)
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self.read_request(reader), IDLE_TIMEOUT)
+                except ApiError as e:
+                    await self.send_json(writer, e.status, {'error': str(e)}, keep_alive=False)
+                    return
+                if request is None:
+                    return
+                if not await self.dispatch(request, writer):
+                    return
+        except (asyncio.TimeoutError, ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            pass  # shutdown(); nothing awaits this task
+        finally:
+            self.writers.discard(writer)
+            writer.close()
+
+    async def read_request(self, reader):
+        """Reads one request; returns None when the client closed the connection."""
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        try:
+            method, target, _ = line.decode('latin-1').split(' ', 2)
+        except ValueError:
+            raise ApiError(400, "Solicitud inválida.")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise ApiError(400, "Demasiados encabezados.")
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        body = b''
+        if method == 'POST':
+            if 'content-length' not in headers:
+                raise ApiError(411, "Falta Content-Length.")
+            try:
+                length = int(headers['content-length'])
+            except ValueError:
+                raise ApiError(400, "Content-Length inválido.")
+            if length > MAX_BODY_BYTES:
+                raise ApiError(413, "El catálogo es demasiado grande.")
+            body = await reader.readexactly(length)
+        return Request(method, target, headers, body)
+
+    async def dispatch(self, request, writer):
+        """Serves one request; returns whether the connection can be reused."""
+        start = self.metrics.begin()
+        try:
+            if request.path == '/metrics':
+                if request.method != 'GET':
+                    raise ApiError(405, "Use GET.")
+                status = 200
+                await self.send_json(writer, status, self.metrics.snapshot(), request.keep_alive)
+                self.metrics.finish(start, status)
+                return request.keep_alive
+            if request.path == '/tags':
+                if request.method != 'POST':
+                    raise ApiError(405, "Use POST.")
+                return await self.generate(request, writer, start)
+            raise ApiError(404, "Ruta desconocida.")
+        except ApiError as e:
+            await self.send_json(writer, e.status, {'error': str(e)}, request.keep_alive)
+            self.metrics.finish(start, e.status)
+            return request.keep_alive
+        except (ConnectionError, asyncio.CancelledError):
+            self.metrics.finish(start, 500)
+            raise
+        except Exception as e:
+            await self.send_json(writer, 500, {'error': str(e)}, keep_alive=False)
+            self.metrics.finish(start, 500)
+            return False
+
+    # Tag documents
+    async def generate(self, request, writer, start):
+        output_format = request.query.get('format', 'pdf')
+        if output_format not in OUTPUT_FORMATS:
+            raise ApiError(400, f"Formato de salida desconocido: {output_format}")
+        layout = request.query.get('layout', DEFAULT_LAYOUT)
+        if layout not in LAYOUT_PROFILES and layout != MIXED_LAYOUT:
+            raise ApiError(400, f"Formato de etiqueta desconocido: {layout}")
+
+        loop = asyncio.get_running_loop()
+        products, importer = await loop.run_in_executor(
+            self.executor, parse_products, request.body, request.headers.get('content-type', '')
+        )
+        if not products:
+            raise ApiError(422, importer.summary() if importer.total_rows else "No hay productos válidos.")
+
+        queue = asyncio.Queue(STREAM_QUEUE_CHUNKS)
+        stream = ChunkStream(loop, queue)
+        task = loop.run_in_executor(self.executor, self.write_document, layout, output_format, products, stream)
+
+        headers = {
+            'Content-Type': CONTENT_TYPES[output_format],
+            'Transfer-Encoding': 'chunked',
+            'X-Labels': str(len(products)),
+            'X-Rejected-Rows': str(importer.error_count),
+        }
+        size = 0
+        first_byte = None
+        try:
+            chunk = await queue.get()
+            if chunk is None:
+                # Nothing written: a failure here can still get its own status
+                await task
+            try:
+                await self.send_head(writer, 200, headers, request.keep_alive)
+                while chunk is not None:
+                    if first_byte is None:
+                        first_byte = time.perf_counter()
+                    writer.write(b'%x\r\n%b\r\n' % (len(chunk), chunk))
+                    size += len(chunk)
+                    await writer.drain()
+                    chunk = await queue.get()
+                await task
+                writer.write(b'0\r\n\r\n')
+                await writer.drain()
+            except Exception:
+                # The status line is gone already: stop the writer and drop the connection
+                stream.cancelled = True
+                while not task.done():
+                    try:
+                        await asyncio.wait_for(queue.get(), 0.1)
+                    except asyncio.TimeoutError:
+                        pass
+                task.exception()  # the writer stops with ConnectionAbortedError; nothing to report
+                self.metrics.finish(start, 500, size=size, first_byte=first_byte)
+                return False
+
+            self.metrics.finish(start, 200, len(products), size, first_byte)
+            return request.keep_alive
+        except asyncio.CancelledError:
+            # Server shutdown: the render thread stops at its next write
+            stream.cancelled = True
+            raise
+
+    @staticmethod
+    def write_document(layout, output_format, products, stream):
+        """Renders a document into `stream` (worker thread)."""
+        model = TagManagerModel(layout, workers=1)
+        try:
+            model.document_writer(products, output_format)(products, stream)
+        finally:
+            model.close()
+            stream.close()
+
+    # Responses
+    async def send_head(self, writer, status, headers, keep_alive):
+        lines = [f'HTTP/1.1 {status} {REASONS.get(status, "")}']
+        lines += [f'{name}: {value}' for name, value in headers.items()]
+        lines.append('Connection: keep-alive' if keep_alive else 'Connection: close')
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        await writer.drain()
+
+    async def send_json(self, writer, status, data, keep_alive=True):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        headers = {'Content-Type': 'application/json; charset=utf-8', 'Content-Length': str(len(body))}
+        await self.send_head(writer, status, headers, keep_alive)
+        writer.write(body)
+        await writer.drain()
+
+
+def start_in_thread(host=None, port=None):
+    """Runs the API on a daemon thread (used by the desktop app); returns the server."""
+    server = TagApiServer(host, port)
+    ready = threading.Event()
+
+    def run():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(server.start())
+        ready.set()
+        try:
+            loop.run_until_complete(server.serve_forever())
+        except asyncio.CancelledError:
+            pass  # close() stopped the server
+        finally:
+            loop.run_until_complete(server.shutdown())
+            loop.close()
+
+    threading.Thread(target=run, name='tag-api', daemon=True).start()
+    ready.wait(5)
+    return server
+
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else (Settings.TAG_API_PORT or DEFAULT_PORT)
+    server = TagApiServer(port=port)
+
+    async def run():
+        await server.start()
+        print(f"API de etiquetas en http://{server.host}:{server.port}")
+        try:
+            await server.serve_forever()
+        finally:
+            await server.shutdown()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Barcode encoding for price tags.
+
+Encodes EAN-13 (13 digit codes, and 12 digit UPC-A codes as the same
+GTIN with a leading 0) and Code 128 (anything else in printable ASCII)
+into bar runs measured in modules. A 12 or 13 digit code with a wrong
+check digit is rejected: printing it would scan as another product.
+Symbols and their SVG / PDF drawings are memoized per code, so reprints
+and duplicate SKUs are encoded once.
+"""
+import re
+from functools import lru_cache
+
+BARCODE_CACHE_SIZE = 16384
+MAX_MODULE_CM = 0.04  # wider bars add nothing for scanners
+BAR_PATTERN = re.compile('1+')
+
+EAN_L = ('0001101', '0011001', '0010011', '0111101', '0100011',
+         '0110001', '0101111', '0111011', '0110111', '0001011')
+EAN_R = tuple(''.join('1' if bit == '0' else '0' for bit in code) for code in EAN_L)
+EAN_G = tuple(code[::-1] for code in EAN_R)
+EAN_PARITY = ('LLLLLL', 'LLGLGG', 'LLGGLG', 'LLGGGL', 'LGLLGG',
+              'LGGLLG', 'LGGGLL', 'LGLGLG', 'LGLGGL', 'LGGLGL')
+EAN_QUIET = (11, 7)
+
+# Bar/space widths of each Code 128 value; 103-105 are the starts, 106 the stop
+CODE128_PATTERNS = (
+    '212222', '222122', '222221', '121223', '121322', '131222', '122213', '122312', '132212', '221213',
+    '221312', '231212', '112232', '122132', '122231', '113222', '123122', '123221', '223211', '221132',
+    '221231', '213212', '223112', '312131', '311222', '321122', '321221', '312212', '322112', '322211',
+    '212123', '212321', '232121', '111323', '131123', '131321', '112313', '132113', '132311', '211313',
+    '231113', '231311', '112133', '112331', '132131', '113123', '113321', '133121', '313121', '211331',
+    '231131', '213113', '213311', '213131', '311123', '311321', '331121', '312113', '312311', '332111',
+    '314111', '221411', '431111', '111224', '111422', '121124', '121421', '141122', '141221', '112214',
+    '112412', '122114', '122411', '142112', '142211', '241211', '221114', '413111', '241112', '134111',
+    '111242', '121142', '121241', '114212', '124112', '124211', '411212', '421112', '421211', '212141',
+    '214121', '412121', '111143', '111341', '131141', '114113', '114311', '411113', '411311', '113141',
+    '114131', '311141', '411131', '211412', '211214', '211232', '2331112',
+)
+CODE128_START_B = 104
+CODE128_START_C = 105
+CODE128_STOP = 106
+CODE128_QUIET = (10, 10)
+
+
+class BarcodeSymbol:
+    """An encoded barcode: black bar runs as (start, width) in modules."""
+
+    __slots__ = ('code', 'kind', 'runs', 'modules')
+
+    def __init__(self, code, kind, runs, modules):
+        self.code = code
+        self.kind = kind
+        self.runs = runs
+        self.modules = modules
+
+
+def ean13_check_digit(digits):
+    """Check digit for the first 12 digits of an EAN-13."""
+    total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(digits[:12]))
+    return str((10 - total % 10) % 10)
+
+
+def is_ean13(code):
+    return len(code) == 13 and code.isdigit() and ean13_check_digit(code) == code[12]
+
+
+def _runs_from_bits(bits, offset):
+    return tuple((offset + match.start(), match.end() - match.start()) for match in BAR_PATTERN.finditer(bits))
+
+
+def _runs_from_widths(widths, offset):
+    runs = []
+    position = offset
+    for i, width in enumerate(widths):
+        width = int(width)
+        if i % 2 == 0:  # patterns alternate bar, space, bar...
+            runs.append((position, width))
+        position += width
+    return tuple(runs)
+
+
+def encode_ean13(code):
+    gtin = '0' + code if len(code) == 12 else code  # UPC-A is EAN-13 with a leading 0
+    if not is_ean13(gtin):
+        raise ValueError(f"Código EAN-13/UPC-A con dígito verificador inválido: {code}")
+    code = gtin
+    parity = EAN_PARITY[int(code[0])]
+    left = ''.join((EAN_L if p == 'L' else EAN_G)[int(d)] for p, d in zip(parity, code[1:7]))
+    right = ''.join(EAN_R[int(d)] for d in code[7:])
+    bits = '101' + left + '01010' + right + '101'
+    quiet_left, quiet_right = EAN_QUIET
+    return BarcodeSymbol(code, 'ean13', _runs_from_bits(bits, quiet_left), quiet_left + len(bits) + quiet_right)
+
+
+def encode_code128(code):
+    if not code or any(not ' ' <= char <= '~' for char in code):
+        raise ValueError(f"Código de barras inválido: {code!r}")
+    # Even-length digit strings pack two digits per symbol in code set C
+    if code.isdigit() and len(code) % 2 == 0:
+        values = [CODE128_START_C] + [int(code[i:i + 2]) for i in range(0, len(code), 2)]
+    else:
+        values = [CODE128_START_B] + [ord(char) - 32 for char in code]
+    checksum = (values[0] + sum(i * value for i, value in enumerate(values[1:], 1))) % 103
+    values += [checksum, CODE128_STOP]
+
+    widths = ''.join(CODE128_PATTERNS[value] for value in values)
+    quiet_left, quiet_right = CODE128_QUIET
+    modules = quiet_left + sum(map(int, widths)) + quiet_right
+    return BarcodeSymbol(code, 'code128', _runs_from_widths(widths, quiet_left), modules)
+
+
+@lru_cache(maxsize=BARCODE_CACHE_SIZE)
+def encode_barcode(code):
+    """
+    EAN-13 for 13 digit codes and UPC-A, Code 128 otherwise.
+
+    Raises:
+        ValueError: For a 12/13 digit code with a wrong check digit, or
+        characters Code 128 cannot encode
+    """
+    code = code.strip()
+    if code.isdigit() and len(code) in (12, 13):
+        return encode_ean13(code)
+    return encode_code128(code)
+
+
+@lru_cache(maxsize=BARCODE_CACHE_SIZE)
+def printable_barcode(code):
+    """`code` if it can be encoded, else None: that label is printed without a barcode."""
+    if not code:
+        return None
+    try:
+        encode_barcode(code)
+    except ValueError:
+        return None
+    return code
+
+
+def symbol_width(symbol, max_width):
+    """Printed width in cm: as wide as allowed, up to MAX_MODULE_CM per module."""
+    return min(max_width, symbol.modules * MAX_MODULE_CM)
+
+
+@lru_cache(maxsize=BARCODE_CACHE_SIZE)
+def svg_barcode(code, max_width, height):
+    """Inline SVG of the bars in module units, stretched to the box.
+
+    Bars are vertical strokes grouped by width, one short path per width.
+    """
+    symbol = encode_barcode(code)
+    paths = {}
+    for x, w in symbol.runs:
+        paths.setdefault(w, []).append(f'M{x + w / 2:g} 0v1')
+    strokes = ''.join(f'<path stroke-width="{w}" d="{"".join(moves)}"/>' for w, moves in sorted(paths.items()))
+    return (
+        f'<svg class="barcode" viewBox="0 0 {symbol.modules} 1" preserveAspectRatio="none" '
+        f'style="width: {symbol_width(symbol, max_width):.2f}cm; height: {height:.2f}cm;">'
+        f'<g stroke="black">{strokes}</g></svg>'
+    )
+
+
+@lru_cache(maxsize=BARCODE_CACHE_SIZE)
+def pdf_barcode_ops(code, max_width_pt, height_pt):
+    """
+    PDF fill operators for the bars with the origin at the symbol's
+    bottom-left corner; callers position it with a `cm` transform.
+
+    Returns:
+        tuple: (operators, width in points)
+    """
+    symbol = encode_barcode(code)
+    width = min(max_width_pt, symbol.modules * MAX_MODULE_CM * 72 / 2.54)
+    module = width / symbol.modules
+    rects = ' '.join(f'{x * module:.3f} 0 {w * module:.3f} {height_pt:.2f} re' for x, w in symbol.runs)
+    return f'0 0 0 rg {rects} f', width
@@ -0,0 +1,131 @@
+"""
+Local product catalog for the tag manager.
+
+Stores every imported or printed product in SQLite with an
+accent-insensitive search key, so staff can pick products while typing
+instead of retyping names and prices.
+"""
+import os
+import sqlite3
+import unicodedata
+from datetime import datetime
+from itertools import islice
+from gestion_comercial.config.settings import Settings
+
+DB_NAME = 'catalog.db'
+WRITE_BATCH = 1000
+KEY_END = '\U0010ffff'  # Sorts after any character; closes a prefix range
+
+
+def normalize_name(text):
+    """Search key: lowercase, without accents and with single spaces ('Azúcar' -> 'azucar')."""
+    decomposed = unicodedata.normalize('NFKD', text)
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(stripped.casefold().split())
+
+
+class ProductCatalog:
+    """SQLite product catalog with prefix and word-prefix search."""
+
+    def __init__(self, path=None):
+        if path is None:
+            os.makedirs(Settings.DATA_DIR, exist_ok=True)
+            path = os.path.join(Settings.DATA_DIR, DB_NAME)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        # WAL lets the UI search while a print job writes
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS products (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                name_key TEXT NOT NULL UNIQUE,
+                price REAL NOT NULL,
+                sku TEXT,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        self.has_fts = self._create_fts()
+        self.conn.commit()
+
+    def _create_fts(self):
+        """Word-prefix index over the search keys, when SQLite has FTS5."""
+        try:
+            self.conn.executescript("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS products_fts
+                    USING fts5(name_key, content='products', content_rowid='id', prefix='2 3');
+                CREATE TRIGGER IF NOT EXISTS products_ai AFTER INSERT ON products BEGIN
+                    INSERT INTO products_fts(rowid, name_key) VALUES (new.id, new.name_key);
+                END;
+                CREATE TRIGGER IF NOT EXISTS products_ad AFTER DELETE ON products BEGIN
+                    INSERT INTO products_fts(products_fts, rowid, name_key) VALUES ('delete', old.id, old.name_key);
+                END;
+            """)
+            return True
+        except sqlite3.OperationalError:
+            return False
+
+    def upsert_many(self, products):
+        """Adds or updates products; the latest price for a name wins."""
+        updated_at = datetime.now().isoformat(timespec='seconds')
+        self.conn.executemany("""
+            INSERT INTO products (name, name_key, price, sku, updated_at) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(name_key) DO UPDATE SET
+                name = excluded.name, price = excluded.price,
+                sku = COALESCE(excluded.sku, products.sku), updated_at = excluded.updated_at
+        """, [
+            (p['name'], normalize_name(p['name']), p['price'], p.get('sku'), updated_at)
+            for p in products
+        ])
+        self.conn.commit()
+
+    def track(self, products):
+        """Yields `products` unchanged while recording them in batches."""
+        iterator = iter(products)
+        while True:
+            batch = list(islice(iterator, WRITE_BATCH))
+            if not batch:
+                return
+            self.upsert_many(batch)
+            yield from batch
+
+    def search(self, text, limit=8):
+        """
+        Finds products whose name starts with `text`, then products with a
+        word starting with it. Accents and case are ignored.
+
+        Returns:
+            list: (name, price) tuples
+        """
+        key = normalize_name(text)
+        if not key:
+            return []
+
+        rows = self.conn.execute(
+            "SELECT id, name, price FROM products WHERE name_key >= ? AND name_key < ? "
+            "ORDER BY name_key LIMIT ?",
+            (key, key + KEY_END, limit)
+        ).fetchall()
+
+        # Single-letter tokens are not in the prefix index and match almost everything
+        tokens = [token for token in key.replace('"', ' ').split() if len(token) > 1]
+        if len(rows) < limit and self.has_fts and tokens:
+            query = ' '.join(f'"{token}"*' for token in tokens)
+            seen = {row[0] for row in rows}
+            try:
+                matches = self.conn.execute(
+                    "SELECT p.id, p.name, p.price FROM products_fts f JOIN products p ON p.id = f.rowid "
+                    "WHERE products_fts MATCH ? LIMIT ?",
+                    (query, limit + len(seen))
+                ).fetchall()
+            except sqlite3.OperationalError:
+                matches = []
+            rows += [row for row in matches if row[0] not in seen][:limit - len(rows)]
+
+        return [(name, price) for _, name, price in rows]
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,51 @@
+"""
+Glyph advance widths for the label font.
+
+Widths are Helvetica-Bold metrics in 1/1000 em, the font used by the PDF
+backend. They are a close match for the bold sans-serif used in the HTML.
+"""
+import unicodedata
+
+FONT_NAME = 'Helvetica-Bold'
+DEFAULT_WIDTH = 556
+
+_ASCII_WIDTHS = (
+    # 32-63:  !"#$%&'()*+,-./0123456789:;<=>?
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    # 64-95: @A-Z[\]^_
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    # 96-126: `a-z{|}~
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+)
+
+_EXTRA_WIDTHS = {
+    '¡': 333, '¿': 611, '°': 400, 'º': 365, 'ª': 370, '½': 834, '¼': 834,
+    '·': 278, '´': 333, '€': 556, '…': 1000, '–': 556, '—': 1000,
+    '‘': 278, '’': 278, '“': 500, '”': 500, '•': 350, '×': 584, ' ': 278,
+}
+
+
+def _build_width_table():
+    table = {chr(32 + i): width for i, width in enumerate(_ASCII_WIDTHS)}
+    table.update(_EXTRA_WIDTHS)
+    # Accented Latin-1 letters share the advance width of their base letter
+    for code in range(0xC0, 0x100):
+        char = chr(code)
+        if char in table:
+            continue
+        base = unicodedata.normalize('NFD', char)[0]
+        if base in table and base != char:
+            table[char] = table[base]
+    return table
+
+
+WIDTHS = _build_width_table()
+
+
+def text_width(text, size):
+    """Returns the advance width of `text` at font `size` (same unit as size)."""
+    get = WIDTHS.get
+    return sum(get(char, DEFAULT_WIDTH) for char in text) * size / 1000.0
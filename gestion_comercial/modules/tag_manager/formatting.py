@@ -0,0 +1,67 @@
+"""
+Batch price formatting for the tag manager.
+
+Catalogs repeat the same price points over and over, so formatted prices
+go through a bounded memo cache. NumPy is used for large arrays when it
+is installed; otherwise everything falls back to plain Python.
+"""
+from array import array
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
+PRICE_CACHE_SIZE = 4096
+NUMPY_MIN_BATCH = 256
+
+
+@lru_cache(maxsize=PRICE_CACHE_SIZE)
+def format_price_chilean(price):
+    """Formats a price with dots as thousands separators (1990 -> '1.990')."""
+    try:
+        return f"{int(round(price)):,}".replace(",", ".")
+    except (ValueError, OverflowError):
+        return str(int(price))
+
+
+@lru_cache(maxsize=PRICE_CACHE_SIZE)
+def price_text(price):
+    """Formats a price as it is printed on the tag ('$1.990')."""
+    return "$" + format_price_chilean(price)
+
+
+def format_prices(prices):
+    """
+    Formats a whole batch of prices at once.
+
+    Args:
+        prices: List, iterable, NumPy array or float64 column
+            (array('d') / memoryview, as in ProductBatch) of prices
+
+    Returns:
+        list: Tag price texts ('$1.990') in the same order
+    """
+    if np is not None and isinstance(prices, (array, memoryview)) and len(prices) >= NUMPY_MIN_BATCH:
+        prices = np.frombuffer(prices, dtype=np.float64)  # zero-copy
+    if np is not None and isinstance(prices, np.ndarray) and len(prices) >= NUMPY_MIN_BATCH:
+        # Format each distinct price once and scatter the results back
+        rounded = np.rint(prices).astype(np.int64)
+        unique, inverse = np.unique(rounded, return_inverse=True)
+        texts = np.array([price_text(int(value)) for value in unique.tolist()], dtype=object)
+        return texts[inverse].tolist()
+
+    return [price_text(price) for price in prices]
+
+
+def price_font_sizes(texts, layout):
+    """Returns the layout's fitted CSS price font size for each price text."""
+    font_size = layout.price_font_size
+    return [font_size(text) for text in texts]
+
+
+def format_price_batch(prices, layout):
+    """Returns (price_texts, font_sizes) for a batch of prices."""
+    texts = format_prices(prices)
+    return texts, price_font_sizes(texts, layout)
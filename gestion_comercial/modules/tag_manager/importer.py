@@ -0,0 +1,248 @@
+"""
+Bulk catalog importer for the tag manager.
+"""
+import csv
+import re
+from itertools import islice
+from gestion_comercial.modules.tag_manager.batch import ProductBatch
+from gestion_comercial.modules.tag_manager.barcode import encode_barcode
+from gestion_comercial.modules.tag_manager.packing import normalize_size
+
+# Same rule used by TagManagerView.validate_price for typed prices
+PRICE_PATTERN = re.compile(r'^\d*\.?\d*$')
+# Chilean thousands format as produced by format_price_chilean (e.g. 12.990)
+THOUSANDS_PATTERN = re.compile(r'^\d{1,3}(\.\d{3})+$')
+
+NAME_COLUMNS = ('nombre', 'producto', 'descripcion', 'descripción', 'name', 'product')
+PRICE_COLUMNS = ('precio', 'valor', 'price')
+SKU_COLUMNS = ('sku', 'codigo', 'código', 'cod', 'code')
+BARCODE_COLUMNS = ('ean', 'ean13', 'barcode', 'codigo de barras', 'código de barras', 'codigo_barras', 'cod_barras')
+SIZE_COLUMNS = ('tamaño', 'tamano', 'etiqueta', 'size')
+
+MAX_REPORTED_ERRORS = 200
+
+
+def normalize_price(value):
+    """Strips currency symbols, spaces and Chilean thousands separators."""
+    value = value.strip().replace('$', '').replace(' ', '')
+    if THOUSANDS_PATTERN.match(value):
+        value = value.replace('.', '')
+    return value
+
+
+def parse_price(value):
+    """
+    Parses a price with the same rules as the tag form.
+
+    Returns:
+        float: The price, or None if it is not a valid positive number
+    """
+    value = normalize_price(value)
+    if not value or not PRICE_PATTERN.match(value):
+        return None
+    try:
+        price_float = float(value)
+    except ValueError:
+        return None
+    return price_float if price_float > 0 else None
+
+
+class CatalogImporter:
+    """Streams products out of supplier CSV/TSV exports in fixed-size batches."""
+
+    def __init__(self, chunk_size=5000):
+        self.chunk_size = chunk_size
+        self.reset()
+
+    def reset(self):
+        self.total_rows = 0
+        self.valid_rows = 0
+        self.error_count = 0
+        self.errors = []
+
+    def iter_products(self, path):
+        """Yields products one by one; memory is bounded by one chunk."""
+        for chunk in self.iter_chunks(path):
+            yield from chunk
+
+    def iter_chunks(self, path):
+        """Yields ProductBatch chunks of validated products, `chunk_size` rows at a time."""
+        self.reset()
+        encoding = self.detect_encoding(path)
+        with open(path, 'r', encoding=encoding, newline='') as f:
+            yield from self.iter_chunks_from_lines(f)
+
+    def iter_chunks_from_lines(self, lines):
+        """Same as iter_chunks but reads from any iterable of text lines."""
+        lines = iter(lines)
+        first_line = next(lines, None)
+        if first_line is None:
+            return
+
+        delimiter = self.detect_delimiter(first_line)
+        reader = csv.reader(self._chain_first(first_line, lines), delimiter=delimiter)
+
+        first_row = next(reader, None)
+        if first_row is None:
+            return
+
+        columns = self.detect_columns(first_row)
+        pending = []
+        if columns is None:
+            # No header: the first row is already data
+            columns = (0, 1, None, None, None)
+            pending.append((reader.line_num, first_row))
+
+        while True:
+            rows = pending + [(reader.line_num, row) for row in islice(reader, self.chunk_size)]
+            pending = []
+            if not rows:
+                return
+            chunk = self.parse_rows(rows, columns)
+            if chunk:
+                yield chunk
+
+    def iter_chunks_from_records(self, records):
+        """Same as iter_chunks but reads product dicts (e.g. decoded JSON).
+
+        Keys are matched like CSV headers, so {'nombre', 'precio'} and
+        {'name', 'price'} both work.
+        """
+        self.reset()
+        fields = (NAME_COLUMNS, PRICE_COLUMNS, SKU_COLUMNS, BARCODE_COLUMNS, SIZE_COLUMNS)
+        records = iter(records)
+        line_number = 0
+        while True:
+            batch = list(islice(records, self.chunk_size))
+            if not batch:
+                return
+            rows = []
+            for record in batch:
+                line_number += 1
+                if not isinstance(record, dict):
+                    self.total_rows += 1
+                    self.report_error(line_number, "El producto no es un objeto")
+                    continue
+                values = {str(key).strip().lower(): value for key, value in record.items()}
+                rows.append((line_number, [self._record_value(values, candidates) for candidates in fields]))
+            chunk = self.parse_rows(rows, (0, 1, 2, 3, 4))
+            if chunk:
+                yield chunk
+
+    @staticmethod
+    def _record_value(values, candidates):
+        for key in candidates:
+            value = values.get(key)
+            if value is not None:
+                return str(value)
+        return ''
+
+    def parse_rows(self, rows, columns):
+        name_col, price_col, sku_col, barcode_col, size_col = columns
+        needed = max(name_col, price_col)
+        products = ProductBatch()
+        for line_number, row in rows:
+            if not row or not any(cell.strip() for cell in row):
+                continue
+            self.total_rows += 1
+
+            if len(row) <= needed:
+                self.report_error(line_number, "Faltan columnas")
+                continue
+
+            name = ' '.join(row[name_col].split())
+            if not name:
+                self.report_error(line_number, "Nombre vacío")
+                continue
+
+            price = parse_price(row[price_col])
+            if price is None:
+                self.report_error(line_number, f"Precio inválido: {row[price_col].strip()!r}")
+                continue
+
+            sku = None
+            if sku_col is not None and sku_col < len(row) and row[sku_col].strip():
+                sku = row[sku_col].strip()
+
+            barcode = None
+            if barcode_col is not None and barcode_col < len(row) and row[barcode_col].strip():
+                barcode = row[barcode_col].strip()
+                try:
+                    encode_barcode(barcode)
+                except ValueError as e:
+                    self.report_error(line_number, f"{e} (se imprime sin código)")
+                    barcode = None
+
+            size = None
+            if size_col is not None and size_col < len(row) and row[size_col].strip():
+                size = normalize_size(row[size_col])
+                if size is None:
+                    self.report_error(line_number, f"Tamaño de etiqueta desconocido: {row[size_col].strip()!r} (se usa estante)")
+            products.append(name, price, sku=sku, barcode=barcode, size=size)
+
+        self.valid_rows += len(products)
+        return products
+
+    def report_error(self, line_number, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line_number, message))
+
+    def summary(self):
+        """Returns a short human readable summary of the last import."""
+        text = f"{self.valid_rows} de {self.total_rows} filas importadas."
+        if self.error_count:
+            text += f"\n{self.error_count} filas con errores:"
+            for line_number, message in self.errors[:10]:
+                text += f"\n  Línea {line_number}: {message}"
+            if self.error_count > 10:
+                text += "\n  ..."
+        return text
+
+    @staticmethod
+    def detect_encoding(path):
+        with open(path, 'rb') as f:
+            sample = f.read(65536)
+        try:
+            sample.decode('utf-8')
+            return 'utf-8-sig'
+        except UnicodeDecodeError as e:
+            # A multi-byte character may be cut at the end of the sample
+            if e.start >= len(sample) - 3:
+                return 'utf-8-sig'
+            return 'cp1252'
+
+    @staticmethod
+    def detect_delimiter(line):
+        counts = {d: line.count(d) for d in ('\t', ';', ',')}
+        delimiter = max(counts, key=counts.get)
+        return delimiter if counts[delimiter] else ','
+
+    @staticmethod
+    def detect_columns(row):
+        """Returns (name, price, sku, barcode, size) column indexes from a header row, or None."""
+        header = [cell.strip().lower() for cell in row]
+
+        def find(candidates):
+            for i, cell in enumerate(header):
+                if cell in candidates:
+                    return i
+            return None
+
+        name_col = find(NAME_COLUMNS)
+        price_col = find(PRICE_COLUMNS)
+        if name_col is None and price_col is None:
+            # Headerless file, unless the price column is clearly not a number
+            if len(row) > 1 and parse_price(row[1]) is None and not row[1].strip().replace('.', '').isdigit():
+                return 0, 1, None, None, None
+            return None
+        if name_col is None:
+            name_col = 0 if price_col != 0 else 1
+        if price_col is None:
+            price_col = 1 if name_col != 1 else 0
+        return name_col, price_col, find(SKU_COLUMNS), find(BARCODE_COLUMNS), find(SIZE_COLUMNS)
+
+    @staticmethod
+    def _chain_first(first_line, lines):
+        yield first_line
+        yield from lines
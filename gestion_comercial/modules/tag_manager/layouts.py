@@ -0,0 +1,258 @@
+"""
+Label layout profiles for the tag manager.
+
+Each profile describes a label stock (grid, label size, margins, fonts).
+Profiles are compiled once into reusable HTML fragments so rendering a
+sheet only has to fill in the label cells.
+"""
+import html as html_escape
+from functools import lru_cache
+from gestion_comercial.modules.tag_manager.textfit import fit_font_size, fit_lines
+from gestion_comercial.modules.tag_manager.barcode import printable_barcode, svg_barcode
+
+DEFAULT_LAYOUT = 'standard_2x7'
+
+# Font size limits in cm for a 7cm wide label (scaled for other stocks)
+PRICE_FONT_MAX = 1.2
+PRICE_FONT_MIN = 0.5
+NAME_FONT_MIN_RATIO = 0.75
+# Labels with a barcode give up a quarter of the price size and keep one name line
+BARCODE_PRICE_RATIO = 0.75
+BARCODE_HEIGHT_RATIO = 0.2  # of the label height
+REFERENCE_LABEL_WIDTH = 7.0
+BORDER_ALLOWANCE = 0.1  # label border plus a rendering safety margin
+
+# A4 portrait, in cm
+PAGE_WIDTH = 21.0
+PAGE_HEIGHT = 29.7
+TITLE_HEIGHT = 2.2
+
+
+class LayoutProfile:
+    """Declarative description of a label stock. All sizes are in cm."""
+
+    def __init__(self, title, rows, columns, label_width, label_height,
+                 gap=0.3, page_margin=0.5, padding=0.4, name_font=0.48,
+                 name_lines=2, show_title=True):
+        self.title = title
+        self.rows = rows
+        self.columns = columns
+        self.label_width = label_width
+        self.label_height = label_height
+        self.gap = gap
+        self.page_margin = page_margin
+        self.padding = padding
+        self.name_font = name_font
+        self.name_lines = name_lines
+        self.show_title = show_title
+
+    @property
+    def labels_per_page(self):
+        return self.rows * self.columns
+
+    @property
+    def grid_width(self):
+        return self.columns * self.label_width + (self.columns - 1) * self.gap
+
+    @property
+    def grid_height(self):
+        return self.rows * self.label_height + (self.rows - 1) * self.gap
+
+    @property
+    def scale(self):
+        return self.label_width / REFERENCE_LABEL_WIDTH
+
+    @property
+    def grid_left(self):
+        return (PAGE_WIDTH - self.grid_width) / 2
+
+    @property
+    def grid_top(self):
+        return self.page_margin + (TITLE_HEIGHT if self.show_title else 0.3)
+
+    def cell_box(self, index):
+        """Returns (x, y, width, height) of label `index`, measured from the page top-left."""
+        row, col = divmod(index, self.columns)
+        x = self.grid_left + col * (self.label_width + self.gap)
+        y = self.grid_top + row * (self.label_height + self.gap)
+        return x, y, self.label_width, self.label_height
+
+
+LAYOUT_PROFILES = {
+    'standard_2x7': LayoutProfile(
+        "Estándar 2x7 (7 x 3,4 cm)", rows=7, columns=2,
+        label_width=7.0, label_height=3.4
+    ),
+    'compact_3x8': LayoutProfile(
+        "Compacta 3x8 (6,3 x 3,2 cm)", rows=8, columns=3,
+        label_width=6.3, label_height=3.2, gap=0.2, padding=0.3,
+        name_font=0.42, show_title=False
+    ),
+    'promo_2x4': LayoutProfile(
+        "Oferta 2x4 (9,5 x 6,5 cm)", rows=4, columns=2,
+        label_width=9.5, label_height=6.5, padding=0.5,
+        name_font=0.62, name_lines=3, show_title=False
+    ),
+    'small_4x10': LayoutProfile(
+        "Pequeña 4x10 (4,7 x 2,5 cm)", rows=10, columns=4,
+        label_width=4.7, label_height=2.5, gap=0.2, padding=0.2,
+        name_font=0.32, show_title=False
+    ),
+}
+
+
+class CompiledLayout:
+    """Pre-rendered HTML fragments for one layout profile."""
+
+    def __init__(self, key, profile):
+        self.key = key
+        self.profile = profile
+        self.labels_per_page = profile.labels_per_page
+
+        self._head_prefix, self._head_suffix = self._compile_header(profile)
+        self.page_open = self._compile_page_open(profile)
+        self.cell_open = '<div class="price-label">'
+        self.cell_template = (
+            self.cell_open +
+            '<div class="price-text" style="font-size: {0};">{1}</div>'
+            '<div class="product-name" style="font-size: {2};">{3}</div>{4}'
+            '</div>\n'
+        )
+        self.empty_cell = (
+            '<div class="price-label empty-label">'
+            '<div>Espacio<br>disponible</div>'
+            '</div>\n'
+        )
+        self.page_close = "</div></section>\n"
+        self.footer = "</body></html>"
+
+        # Text fitting box and font limits
+        self.inner_width = round(profile.label_width - 2 * profile.padding - BORDER_ALLOWANCE, 2)
+        self.price_max = round(PRICE_FONT_MAX * profile.scale, 2)
+        self.price_min = round(PRICE_FONT_MIN * profile.scale, 2)
+        self.name_min = round(profile.name_font * NAME_FONT_MIN_RATIO, 2)
+        self.barcode_price_max = round(self.price_max * BARCODE_PRICE_RATIO, 2)
+        self.barcode_height = round(profile.label_height * BARCODE_HEIGHT_RATIO, 2)
+
+    def header(self, title):
+        return self._head_prefix + html_escape.escape(title) + self._head_suffix
+
+    def cell(self, price_text, name, barcode=None):
+        """Renders one label; the name is wrapped and escaped here."""
+        barcode = printable_barcode(barcode)
+        has_barcode = barcode is not None
+        name_size, lines = self.name_fit(name, has_barcode)
+        name_html = '<br>'.join(html_escape.escape(line) for line in lines)
+        barcode_html = svg_barcode(barcode, self.inner_width, self.barcode_height) if has_barcode else ''
+        return self.cell_template.format(
+            self.price_font_size(price_text, has_barcode), price_text, f"{name_size:.2f}cm", name_html, barcode_html
+        )
+
+    def positioned_cell(self, x, y, price_text, name, barcode=None):
+        """Renders one label at (x, y) cm inside a mixed sheet (see packing)."""
+        p = self.profile
+        style = (f"left: {x:.2f}cm; top: {y:.2f}cm; width: {p.label_width}cm; "
+                 f"height: {p.label_height}cm; padding: {p.padding}cm;")
+        return f'<div class="price-label" style="{style}">' + self.cell(price_text, name, barcode)[len(self.cell_open):]
+
+    def price_font_cm(self, price_text, barcode=False):
+        """Largest price font size (cm) that fits the label width."""
+        price_max = self.barcode_price_max if barcode else self.price_max
+        return fit_font_size(price_text, self.inner_width, price_max, self.price_min)
+
+    def price_font_size(self, price_text, barcode=False):
+        return f"{self.price_font_cm(price_text, barcode):.2f}cm"
+
+    def name_fit(self, name, barcode=False):
+        """Returns (font size in cm, lines) for a product name."""
+        max_lines = 1 if barcode else self.profile.name_lines
+        return fit_lines(name, self.inner_width, self.profile.name_font, self.name_min, max_lines)
+
+    def render_page(self, cells):
+        """Joins pre-rendered cells into a full page, padding empty slots."""
+        missing = self.labels_per_page - len(cells)
+        return self.page_open + "".join(cells) + self.empty_cell * missing + self.page_close
+
+    @staticmethod
+    def _compile_page_open(profile):
+        title = '<div class="page-title">ETIQUETAS DE PRECIOS</div>' if profile.show_title else ''
+        return f'<section class="sheet">{title}<div class="price-grid">\n'
+
+    @staticmethod
+    def _compile_header(profile):
+        p = profile
+        prefix = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>"""
+        suffix = f"""</title>
+    <style>
+        @page {{ margin: {p.page_margin}cm; size: A4 portrait; }}
+        * {{ box-sizing: border-box; margin: 0; padding: 0; }}
+        body {{
+            font-family: 'Segoe UI', 'Roboto', 'Arial', sans-serif;
+            background: white; color: black;
+            print-color-adjust: exact; -webkit-print-color-adjust: exact;
+            display: flex; flex-direction: column; align-items: center;
+            min-height: 100vh; justify-content: flex-start; padding: 0.5cm 0;
+        }}
+        .sheet {{
+            display: flex; flex-direction: column; align-items: center;
+        }}
+        .sheet + .sheet {{ page-break-before: always; break-before: page; }}
+        .page-title {{
+            text-align: center; font-size: 23px; font-weight: bold;
+            margin-bottom: 0.8cm; margin-top: 0.8cm; color: #2c3e50;
+            letter-spacing: 2px; text-transform: uppercase;
+        }}
+        .mixed-sheet {{ position: relative; }}
+        .mixed-sheet .price-label {{ position: absolute; }}
+        .mixed-sheet .product-name {{ display: block; }}
+        .price-grid {{
+            display: grid; grid-template-columns: repeat({p.columns}, {p.label_width}cm);
+            grid-template-rows: repeat({p.rows}, {p.label_height}cm); gap: {p.gap}cm;
+            width: {p.grid_width:.2f}cm; justify-content: center; align-content: start;
+        }}
+        .price-label {{
+            display: flex; flex-direction: column; align-items: center;
+            justify-content: center; background: white;
+            border: 2px solid #2c3e50; border-radius: 0.2cm;
+            padding: {p.padding}cm; text-align: center; height: {p.label_height}cm; width: 100%;
+            box-shadow: 0 1px 3px rgba(0,0,0,0.1); overflow: hidden;
+        }}
+        .price-text {{
+            font-weight: 900; color: #2c3e50; margin-bottom: {0.3 * p.scale:.2f}cm;
+            text-shadow: 1px 1px 2px rgba(0,0,0,0.1); line-height: 1.1;
+        }}
+        .product-name {{
+            font-size: {p.name_font}cm; font-weight: bold; color: #34495e;
+            text-align: center; line-height: 1.3; max-width: 100%;
+            word-wrap: break-word; hyphens: auto; overflow: hidden;
+            display: -webkit-box; -webkit-line-clamp: {p.name_lines}; -webkit-box-orient: vertical;
+        }}
+        .barcode {{
+            display: block; flex-shrink: 0; margin-top: {0.15 * p.scale:.2f}cm;
+        }}
+        .empty-label {{
+            border: 2px dashed #bdc3c7 !important; background: #f8f9fa !important;
+            color: #95a5a6; font-style: italic; font-size: {0.38 * p.scale:.2f}cm;
+        }}
+        @media print {{
+            body {{ margin: 0; padding: 0.3cm 0; }}
+            .price-grid {{ page-break-inside: avoid; }}
+            .price-label {{ page-break-inside: avoid; box-shadow: none; }}
+        }}
+    </style>
+</head>
+<body>
+"""
+        return prefix, suffix
+
+
+@lru_cache(maxsize=None)
+def compile_layout(key=DEFAULT_LAYOUT):
+    """Compiles a layout profile once per process."""
+    if key not in LAYOUT_PROFILES:
+        raise ValueError(f"Layout '{key}' not registered.")
+    return CompiledLayout(key, LAYOUT_PROFILES[key])
@@ -1,138 +1,323 @@
 import os
-import tempfile
 import subprocess
 import sys
-import html as html_escape
 from datetime import datetime
+from functools import partial
+from itertools import islice
+from gestion_comercial.modules.tag_manager.layouts import DEFAULT_LAYOUT, compile_layout
+from gestion_comercial.modules.tag_manager.pdf import PdfTagWriter
+from gestion_comercial.modules.tag_manager.thermal import THERMAL_WRITERS
+from gestion_comercial.modules.tag_manager.barcode import printable_barcode
+from gestion_comercial.modules.tag_manager.snapshots import PriceSnapshotStore
+from gestion_comercial.modules.tag_manager.catalog import ProductCatalog
+from gestion_comercial.modules.tag_manager.spool import SpoolManager, content_key
+from gestion_comercial.modules.tag_manager.batch import ProductBatch, columns
+from gestion_comercial.modules.tag_manager.packing import (
+    MIXED_LAYOUT, LABEL_SIZES, DEFAULT_SIZE, SHEET_WIDTH, SHEET_HEIGHT, SHEET_MARGIN, pack_products
+)
+from gestion_comercial.modules.tag_manager.parallel import (
+    ParallelRenderer, PARALLEL_MIN_LABELS, render_html_chunk, render_pdf_chunk
+)
+from gestion_comercial.modules.tag_manager import formatting
+
+OUTPUT_FORMATS = {'html': '.html', 'pdf': '.pdf', 'zpl': '.zpl', 'escpos': '.bin'}
+# Formats opened with the desktop viewer; thermal output stays in the spool
+DOCUMENT_FORMATS = ('html', 'pdf')
 
 class TagManagerModel:
+    def __init__(self, layout=DEFAULT_LAYOUT, spool=None, workers=None):
+        self.set_layout(layout)
+        self.spool = spool or SpoolManager.default()
+        self.workers = workers or os.cpu_count() or 1
+        self._snapshots = None
+        self._catalog = None
+        self._renderer = None
+        self.skipped_barcodes = []  # codes of the last print_tags() printed without a barcode
+
+    @property
+    def catalog(self):
+        """Product catalog used for autocomplete, opened on first use."""
+        if self._catalog is None:
+            self._catalog = ProductCatalog()
+        return self._catalog
+
+    @property
+    def snapshots(self):
+        """Printed-price store, opened on first use."""
+        if self._snapshots is None:
+            self._snapshots = PriceSnapshotStore()
+        return self._snapshots
+
+    @property
+    def renderer(self):
+        """Process pool for large documents, started on first use."""
+        if self._renderer is None:
+            self._renderer = ParallelRenderer(self.workers)
+        return self._renderer
+
+    def use_parallel(self, products):
+        """Large product lists are rendered in the process pool."""
+        return (not self.mixed and self.workers > 1 and isinstance(products, (list, tuple, ProductBatch))
+                and len(products) >= PARALLEL_MIN_LABELS)
+
+    def set_layout(self, key):
+        """Selects the label stock used for the next documents.
+
+        MIXED_LAYOUT packs each product at its own label size (see packing);
+        `layout` is then the shelf stock, used for the page style and for
+        thermal output.
+        """
+        self.layout_key = key
+        self.mixed = key == MIXED_LAYOUT
+        self.layout = compile_layout(LABEL_SIZES[DEFAULT_SIZE] if self.mixed else key)
+
     def generate_html(self, products):
         """Generates HTML content for the tags."""
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <title>Etiquetas de Precios - {datetime.now().strftime('%d/%m/%Y')}</title>
-            <style>
-                @page {{ margin: 0.5cm; size: A4 portrait; }}
-                * {{ box-sizing: border-box; margin: 0; padding: 0; }}
-                body {{
-                    font-family: 'Segoe UI', 'Roboto', 'Arial', sans-serif;
-                    background: white; color: black;
-                    print-color-adjust: exact; -webkit-print-color-adjust: exact;
-                    display: flex; flex-direction: column; align-items: center;
-                    min-height: 100vh; justify-content: flex-start; padding: 0.5cm 0;
-                }}
-                .page-title {{
-                    text-align: center; font-size: 23px; font-weight: bold;
-                    margin-bottom: 0.8cm; margin-top: 0.8cm; color: #2c3e50;
-                    letter-spacing: 2px; text-transform: uppercase;
-                }}
-                .price-grid {{
-                    display: grid; grid-template-columns: 7cm 7cm;
-                    grid-template-rows: repeat(7, 3.4cm); gap: 0.3cm;
-                    width: 14.6cm; justify-content: center; align-content: start;
-                }}
-                .price-label {{
-                    display: flex; flex-direction: column; align-items: center;
-                    justify-content: center; background: white;
-                    border: 2px solid #2c3e50; border-radius: 0.2cm;
-                    padding: 0.4cm; text-align: center; height: 3.4cm; width: 100%;
-                    box-shadow: 0 1px 3px rgba(0,0,0,0.1); overflow: hidden;
-                }}
-                .price-text {{
-                    font-weight: 900; color: #2c3e50; margin-bottom: 0.3cm;
-                    text-shadow: 1px 1px 2px rgba(0,0,0,0.1); line-height: 1.1;
-                }}
-                .product-name {{
-                    font-size: 0.48cm; font-weight: bold; color: #34495e;
-                    text-align: center; line-height: 1.3; max-width: 100%;
-                    word-wrap: break-word; hyphens: auto; overflow: hidden;
-                    display: -webkit-box; -webkit-line-clamp: 2; -webkit-box-orient: vertical;
-                }}
-                .empty-label {{
-                    border: 2px dashed #bdc3c7 !important; background: #f8f9fa !important;
-                    color: #95a5a6; font-style: italic; font-size: 0.38cm;
-                }}
-                @media print {{
-                    body {{ margin: 0; padding: 0.3cm 0; }}
-                    .price-grid {{ page-break-inside: avoid; }}
-                    .price-label {{ page-break-inside: avoid; box-shadow: none; }}
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="page-title">ETIQUETAS DE PRECIOS</div>
-            <div class="price-grid">
+        return "".join(self.iter_html(products))
+
+    def write_html(self, products, stream, parallel=False):
+        """Streams the tag document into `stream` page by page.
+
+        Returns the number of labels written.
+        """
+        counter = [0]
+        for chunk in self.iter_html(products, counter, parallel):
+            stream.write(chunk)
+        return counter[0]
+
+    def iter_html(self, products, counter=None, parallel=False):
+        """Yields the HTML document in chunks: header, one chunk per page, footer.
+
+        `products` may be any iterable; it is consumed lazily so memory stays
+        bounded by a single page regardless of the catalog size. With
+        `parallel`, chunks of pages are rendered in the process pool.
+        """
+        layout = self.layout
+        yield layout.header(f"Etiquetas de Precios - {datetime.now().strftime('%d/%m/%Y')}")
+
+        if parallel:
+            chunks = self.renderer.map_pages(render_html_chunk, layout, products)
+        else:
+            chunks = ((self._render_page(page), len(page)) for page in self.paginate(products))
+
+        written = 0
+        for html, count in chunks:
+            yield html
+            written += count
+            if counter is not None:
+                counter[0] = written
+
+        if not written:
+            yield self._render_page([])
+
+        yield layout.footer
+
+    def write_mixed_html(self, products, stream):
+        """Writes the products packed at their own label sizes as HTML.
+
+        Returns the number of labels written.
+        """
+        stream.write(self.layout.header(f"Etiquetas de Precios - {datetime.now().strftime('%d/%m/%Y')}"))
+        written = 0
+        sheet_open = (f'<section class="sheet"><div class="mixed-sheet" '
+                      f'style="width: {SHEET_WIDTH:.2f}cm; height: {SHEET_HEIGHT:.2f}cm;">\n')
+        for sheet in pack_products(products):
+            stream.write(sheet_open)
+            stream.write(''.join(layout.positioned_cell(*label) for layout, *label in sheet))
+            stream.write(self.layout.page_close)
+            written += len(sheet)
+        stream.write(self.layout.footer)
+        return written
+
+    def write_mixed_pdf(self, products, stream):
+        """Writes the products packed at their own label sizes as a PDF.
+
+        Returns the number of labels written.
+        """
+        writer = PdfTagWriter(stream, self.layout)
+        written = 0
+        for sheet in pack_products(products):
+            labels = [(layout, x + SHEET_MARGIN, y + SHEET_MARGIN, *cell) for layout, x, y, *cell in sheet]
+            writer.add_page_content(writer.renderer.mixed_page_content(labels))
+            written += len(sheet)
+        if not written:
+            writer.add_page([])
+        writer.close()
+        return written
+
+    def paginate(self, products, per_page=None):
+        """Splits any iterable of products into lists of `per_page` items.
+
+        A ProductBatch is split into views instead, without copying.
         """
-        
-        products_to_show = products[:14]
-        
-        for product in products_to_show:
-            price_formatted = self.format_price_chilean(product['price'])
-            price_text = f"${price_formatted}"
-            font_size = self.calculate_price_font_size(price_text)
-            product_name_escaped = html_escape.escape(product['name'])
-            
-            html_content += f"""
-                <div class="price-label">
-                    <div class="price-text" style="font-size: {font_size};">
-                        {price_text}
-                    </div>
-                    <div class="product-name">
-                        {product_name_escaped}
-                    </div>
-                </div>
-            """
-            
-        for i in range(len(products_to_show), 14):
-            html_content += """
-                <div class="price-label empty-label">
-                    <div>Espacio<br>disponible</div>
-                </div>
-            """
-            
-        html_content += "</div></body></html>"
-        return html_content
+        per_page = per_page or self.layout.labels_per_page
+        if isinstance(products, ProductBatch):
+            yield from products.pages(per_page)
+            return
+        iterator = iter(products)
+        while True:
+            page = list(islice(iterator, per_page))
+            if not page:
+                return
+            yield page
+
+    def write_pdf(self, products, stream, parallel=False):
+        """Streams the tags as a vector PDF into a binary `stream`.
+
+        Returns the number of labels written.
+        """
+        writer = PdfTagWriter(stream, self.layout)
+        written = 0
+        if parallel:
+            chunks = self.renderer.map_pages(render_pdf_chunk, self.layout, products, writer.renderer.compress)
+            for contents, count in chunks:
+                for content in contents:
+                    writer.add_page_content(content)
+                written += count
+        else:
+            for page in self.paginate(products):
+                prices, names, barcodes = columns(page)
+                writer.add_page(list(zip(formatting.format_prices(prices), names, barcodes)))
+                written += len(page)
+
+        if not written:
+            writer.add_page([])
+
+        writer.close()
+        return written
+
+    def write_thermal(self, products, stream, output_format='zpl'):
+        """Streams the tags as thermal printer commands ('zpl' or 'escpos').
+
+        Returns the number of labels written.
+        """
+        writer = THERMAL_WRITERS[output_format](stream, self.layout)
+        written = 0
+        for page in self.paginate(products):
+            prices, names, _ = columns(page)
+            for text, name in zip(formatting.format_prices(prices), names):
+                writer.add_label(text, name)
+            written += len(page)
+        writer.close()
+        return written
+
+    def _render_page(self, page):
+        layout = self.layout
+        prices, names, barcodes = columns(page)
+        cells = [layout.cell(*cell) for cell in zip(formatting.format_prices(prices), names, barcodes)]
+        return layout.render_page(cells)
 
     def format_price_chilean(self, price):
-        try:
-            return f"{int(round(price)):,}".replace(",", ".")
-        except (ValueError, OverflowError):
-            return str(int(price))
+        return formatting.format_price_chilean(price)
+
+    def format_prices(self, prices):
+        """Formats a whole catalog of prices; see formatting.format_price_batch."""
+        return formatting.format_price_batch(prices, self.layout)
 
     def calculate_price_font_size(self, price_text):
-        length = len(price_text)
-        if length <= 4: return "1.2cm"
-        elif length <= 6: return "1.1cm"
-        elif length <= 8: return "1.0cm"
-        elif length <= 10: return "0.90cm"
-        elif length <= 12: return "0.80cm"
-        elif length <= 14: return "0.8cm"
-        else: return "0.7cm"
-
-    def print_tags(self, products):
-        if not products: return False, "No hay productos válidos."
-        
+        return self.layout.price_font_size(price_text)
+
+    def print_tags(self, products, output_format='html', only_changed=False):
+        """Writes every product into one multi-page document and opens it.
+
+        With `only_changed`, only products whose price differs from the last
+        printed one are included. Documents are kept in the spool, so
+        printing an identical list again reuses the existing file. Every
+        product also goes into the catalog used for autocomplete. A barcode
+        that cannot be encoded leaves its label without one; those codes are
+        listed in `skipped_barcodes`.
+
+        Returns:
+            tuple: (success, path or error message, labels printed)
+        """
+        if output_format not in OUTPUT_FORMATS:
+            return False, f"Formato de salida desconocido: {output_format}", 0
+        suffix = OUTPUT_FORMATS[output_format]
+        self.skipped_barcodes = []
+
         try:
-            html_content = self.generate_html(products)
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.html', delete=False, encoding='utf-8') as f:
-                f.write(html_content)
-                temp_path = f.name
-                
-            if sys.platform.startswith('win'):
-                os.startfile(temp_path)
-            elif sys.platform.startswith('darwin'):
-                subprocess.run(['open', temp_path])
-            else:
-                subprocess.run(['xdg-open', temp_path])
-                
-            return True, temp_path
+            key = None
+            if isinstance(products, (list, tuple, ProductBatch)) and not only_changed:
+                key = self.document_key(products, output_format)
+                path = self.spool.lookup(key, suffix)
+                if path:
+                    # The reprinted prices are on the shelf again: record them
+                    # exactly as a fresh document would
+                    for _ in self.snapshots.track(self.catalog.track(self.check_barcodes(products, output_format))):
+                        pass
+                    self.snapshots.commit()
+                    if output_format in DOCUMENT_FORMATS:
+                        self.open_document(path)
+                    return True, path, len(products)
+
+            snapshots = self.snapshots
+            tracked = snapshots.track(self.catalog.track(self.check_barcodes(products, output_format)), only_changed)
+            writer = self.document_writer(products, output_format)
+
+            with self.spool.create(suffix, key) as entry:
+                count = writer(tracked, entry)
+                if not count:
+                    entry.cancel()
+
+            if not count:
+                snapshots.rollback()
+                if only_changed:
+                    return False, "No hay precios modificados desde la última impresión.", 0
+                return False, "No hay productos válidos.", 0
+
+            snapshots.commit()
+            if output_format in DOCUMENT_FORMATS:
+                self.open_document(entry.path)
+            return True, entry.path, count
         except Exception as e:
-            return False, str(e)
-            
-    def cleanup_temp_file(self, path):
-        try:
-            if os.path.exists(path): os.unlink(path)
-        except Exception: pass
+            if self._snapshots is not None:
+                self._snapshots.rollback()
+            return False, str(e), 0
+
+    def check_barcodes(self, products, output_format):
+        """Yields the products, noting in `skipped_barcodes` the codes that cannot be printed."""
+        if output_format in THERMAL_WRITERS:
+            yield from products  # thermal labels carry no barcode
+            return
+        for product in products:
+            code = product.get('barcode')
+            if code and printable_barcode(code) is None:
+                self.skipped_barcodes.append(code)
+            yield product
+
+    def document_writer(self, products, output_format):
+        """Returns `write(products, stream)` for an output format; it returns the label count."""
+        if output_format in THERMAL_WRITERS:
+            return partial(self.write_thermal, output_format=output_format)
+        if self.mixed:
+            return self.write_mixed_pdf if output_format == 'pdf' else self.write_mixed_html
+        if output_format == 'pdf':
+            return partial(self.write_pdf, parallel=self.use_parallel(products))
+        return partial(self.write_html, parallel=self.use_parallel(products))
+
+    def document_key(self, products, output_format):
+        """Spool key for a product list; includes the date printed in the title."""
+        return content_key(
+            self.layout_key, output_format, datetime.now().strftime('%d/%m/%Y'),
+            [(p['name'], p['price'], p.get('sku'), p.get('barcode'), p.get('size')) for p in products]
+        )
+
+    def open_document(self, path):
+        if sys.platform.startswith('win'):
+            os.startfile(path)
+        elif sys.platform.startswith('darwin'):
+            subprocess.run(['open', path])
+        else:
+            subprocess.run(['xdg-open', path])
+
+    def close(self):
+        """Stops the worker processes and closes the databases."""
+        if self._renderer is not None:
+            self._renderer.close()
+            self._renderer = None
+        if self._catalog is not None:
+            self._catalog.close()
+            self._catalog = None
+        if self._snapshots is not None:
+            self._snapshots.close()
+            self._snapshots = None
@@ -0,0 +1,161 @@
+"""
+Mixed label sizes packed onto A4 sheets.
+
+Products can ask for a shelf, promo or small label; each size is one of
+the layout profiles. Labels are packed with MaxRects (best short side
+fit), largest first, into the first sheet with room, which keeps the
+sheet count close to the area bound without trying every order.
+"""
+from gestion_comercial.modules.tag_manager.layouts import PAGE_WIDTH, PAGE_HEIGHT, compile_layout
+from gestion_comercial.modules.tag_manager.batch import ProductBatch, columns
+from gestion_comercial.modules.tag_manager import formatting
+
+MIXED_LAYOUT = 'mixed'  # layout key that packs each product at its own size
+
+LABEL_SIZES = {
+    'shelf': 'standard_2x7',
+    'promo': 'promo_2x4',
+    'small': 'small_4x10',
+}
+DEFAULT_SIZE = 'shelf'
+SIZE_ALIASES = {
+    'shelf': 'shelf', 'estante': 'shelf', 'normal': 'shelf', 'estandar': 'shelf', 'estándar': 'shelf',
+    'promo': 'promo', 'oferta': 'promo', 'grande': 'promo',
+    'small': 'small', 'pequeña': 'small', 'pequena': 'small', 'chica': 'small',
+}
+
+SHEET_MARGIN = 0.8  # cm from the page edge, inside any printer's margin
+PACK_GAP = 0.2      # cm between labels, for cutting
+SHEET_WIDTH = PAGE_WIDTH - 2 * SHEET_MARGIN
+SHEET_HEIGHT = PAGE_HEIGHT - 2 * SHEET_MARGIN
+
+
+def normalize_size(value):
+    """Maps a size name from a file or form to a LABEL_SIZES key (None if unknown)."""
+    if not value:
+        return DEFAULT_SIZE
+    return SIZE_ALIASES.get(str(value).strip().lower())
+
+
+class MaxRectsSheet:
+    """Free space of one sheet as a list of maximal free rectangles."""
+
+    def __init__(self, width, height):
+        self.free = [(0.0, 0.0, width, height)]
+
+    def find(self, width, height):
+        """Best short side fit; returns (x, y) or None."""
+        best = None
+        best_score = None
+        for x, y, free_width, free_height in self.free:
+            if width <= free_width + 1e-9 and height <= free_height + 1e-9:
+                leftover = min(free_width - width, free_height - height)
+                score = (leftover, y, x)
+                if best_score is None or score < best_score:
+                    best, best_score = (x, y), score
+        return best
+
+    def place(self, x, y, width, height):
+        right, bottom = x + width, y + height
+        split = []
+        for free in self.free:
+            fx, fy, fw, fh = free
+            if x >= fx + fw or right <= fx or y >= fy + fh or bottom <= fy:
+                split.append(free)
+                continue
+            # Keep the parts of the free rectangle around the placed one
+            if x > fx:
+                split.append((fx, fy, x - fx, fh))
+            if right < fx + fw:
+                split.append((right, fy, fx + fw - right, fh))
+            if y > fy:
+                split.append((fx, fy, fw, y - fy))
+            if bottom < fy + fh:
+                split.append((fx, bottom, fw, fy + fh - bottom))
+        self.free = self._prune(split)
+
+    @staticmethod
+    def _prune(rects):
+        """Drops rectangles contained in another one."""
+        rects.sort(key=lambda r: r[2] * r[3], reverse=True)
+        kept = []
+        for x, y, w, h in rects:
+            if w <= 1e-9 or h <= 1e-9:
+                continue
+            if not any(x >= kx - 1e-9 and y >= ky - 1e-9 and x + w <= kx + kw + 1e-9 and y + h <= ky + kh + 1e-9
+                       for kx, ky, kw, kh in kept):
+                kept.append((x, y, w, h))
+        return kept
+
+
+def pack_labels(sizes, width=SHEET_WIDTH, height=SHEET_HEIGHT, gap=PACK_GAP):
+    """
+    Packs labels of the given (width, height) sizes in cm onto sheets.
+
+    Returns:
+        list: one list per sheet of (item index, x, y), in reading order,
+        with x/y measured from the top-left corner of the packing area.
+    """
+    # Each label reserves a gap on its right and bottom; the area grows by one gap to match
+    order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][0] * sizes[i][1], i))
+    sheets = []
+    placements = []
+    # Free space only shrinks, so a sheet that cannot take a size never will
+    first_open = {}
+
+    for index in order:
+        label_width, label_height = sizes[index]
+        size = (label_width + gap, label_height + gap)
+        start = first_open.get(size, 0)
+        position = None
+        for sheet_index in range(start, len(sheets)):
+            position = sheets[sheet_index].find(*size)
+            if position is not None:
+                break
+            if sheet_index == start:
+                start += 1
+        first_open[size] = start
+
+        if position is None:
+            sheet = MaxRectsSheet(width + gap, height + gap)
+            position = sheet.find(*size)
+            if position is None:
+                raise ValueError(f"La etiqueta de {label_width} x {label_height} cm no cabe en la hoja.")
+            sheets.append(sheet)
+            placements.append([])
+            sheet_index = len(sheets) - 1
+
+        sheets[sheet_index].place(*position, *size)
+        placements[sheet_index].append((index, position[0], position[1]))
+
+    for sheet in placements:
+        sheet.sort(key=lambda item: (round(item[2], 3), item[1]))
+    return placements
+
+
+def pack_products(products):
+    """
+    Packs products at the label size each one asks for.
+
+    The whole list is needed to pack it, so unlike the grid writers this
+    reads every product up front.
+
+    Returns:
+        list: one list per sheet of (layout, x, y, price_text, name, barcode),
+        with x/y in cm from the top-left corner of the packing area.
+    """
+    products = products if hasattr(products, '__len__') else list(products)
+    layouts = {size: compile_layout(key) for size, key in LABEL_SIZES.items()}
+    if isinstance(products, ProductBatch):
+        requested = products.column('size')
+    else:
+        requested = [p.get('size') for p in products]
+    kinds = [layouts[normalize_size(size) or DEFAULT_SIZE] for size in requested]
+    prices, names, barcodes = columns(products)
+    texts = formatting.format_prices(prices)
+
+    sizes = [(layout.profile.label_width, layout.profile.label_height) for layout in kinds]
+    return [
+        [(kinds[i], x, y, texts[i], names[i], barcodes[i]) for i, x, y in sheet]
+        for sheet in pack_labels(sizes)
+    ]
@@ -0,0 +1,88 @@
+"""
+Parallel tag generation for very large catalogs.
+
+The product stream is cut into page-aligned chunks that are rendered in
+a process pool; results come back in input order, so the merged document
+is identical to the single-process one. Chunks travel as ProductBatch
+columns to keep the pickling cost low.
+"""
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, repeat
+from gestion_comercial.modules.tag_manager.layouts import compile_layout
+from gestion_comercial.modules.tag_manager.pdf import PdfPageRenderer
+from gestion_comercial.modules.tag_manager.batch import ProductBatch
+from gestion_comercial.modules.tag_manager import formatting
+
+PARALLEL_MIN_LABELS = 5000  # below this, starting the workers costs more than it saves
+CHUNK_PAGES = 25
+
+
+def _pages(layout, batch):
+    """Splits a ProductBatch into pages of formatted (price_text, name, barcode) cells."""
+    for page in batch.pages(layout.labels_per_page):
+        yield list(zip(formatting.format_prices(page.price_column()), page.name_column(), page.column('barcode')))
+
+
+def render_html_chunk(layout_key, batch):
+    """Renders the HTML of consecutive pages (worker process)."""
+    layout = compile_layout(layout_key)
+    return ''.join(
+        layout.render_page([layout.cell(*cell) for cell in cells])
+        for cells in _pages(layout, batch)
+    )
+
+
+def render_pdf_chunk(layout_key, batch, compress=True):
+    """Renders the PDF content streams of consecutive pages (worker process)."""
+    layout = compile_layout(layout_key)
+    renderer = PdfPageRenderer(layout, compress)
+    return [renderer.page_content(cells) for cells in _pages(layout, batch)]
+
+
+class ParallelRenderer:
+    """Process pool that renders page chunks and yields them in order."""
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = None
+
+    def map_pages(self, function, layout, products, *args):
+        """
+        Runs `function(layout.key, batch, *args)` over page-aligned chunks.
+
+        `products` is read lazily; at most two chunks per worker are in
+        flight at a time.
+
+        Yields:
+            tuple: (chunk result, number of labels in the chunk)
+        """
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(self.workers)
+
+        chunk_size = CHUNK_PAGES * layout.labels_per_page
+        if isinstance(products, ProductBatch):
+            chunks = iter(products.pages(chunk_size))
+        else:
+            iterator = iter(products)
+            chunks = (ProductBatch.from_products(islice(iterator, chunk_size)) for _ in repeat(None))
+        pending = deque()
+        exhausted = False
+        while True:
+            if not exhausted:
+                chunk = next(chunks, None)
+                if chunk:
+                    pending.append((self.executor.submit(function, layout.key, chunk, *args), len(chunk)))
+                else:
+                    exhausted = True
+            if not pending:
+                return
+            if exhausted or len(pending) >= self.workers * 2:
+                future, count = pending.popleft()
+                yield future.result(), count
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
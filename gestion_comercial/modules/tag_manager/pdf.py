@@ -0,0 +1,232 @@
+"""
+Native PDF backend for the tag manager.
+
+Writes the label sheets as vector boxes and text without going through a
+browser. Pages are streamed to the output as they are produced; only the
+page object numbers are kept until the document is closed.
+"""
+import zlib
+from gestion_comercial.modules.tag_manager.fontmetrics import FONT_NAME, text_width
+from gestion_comercial.modules.tag_manager.barcode import pdf_barcode_ops, printable_barcode
+
+CM = 72 / 2.54  # PDF points per cm
+PAGE_WIDTH_PT = 21.0 * CM
+PAGE_HEIGHT_PT = 29.7 * CM
+
+BORDER_COLOR = (0.173, 0.243, 0.314)   # #2c3e50
+NAME_COLOR = (0.204, 0.286, 0.369)     # #34495e
+EMPTY_BORDER = (0.741, 0.765, 0.780)   # #bdc3c7
+EMPTY_FILL = (0.973, 0.976, 0.980)     # #f8f9fa
+EMPTY_TEXT = (0.584, 0.647, 0.651)     # #95a5a6
+
+# Object numbers reserved before any page is written
+CATALOG_ID = 1
+PAGES_ID = 2
+FONT_ID = 3
+
+
+def pdf_string(text):
+    """Escapes text as a PDF literal string (encoded to WinAnsi on write)."""
+    return '(' + text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)') + ')'
+
+
+class PdfPageRenderer:
+    """Builds page content streams. It holds no document state, so worker processes can use it."""
+
+    def __init__(self, layout, compress=True):
+        self.layout = layout
+        self.profile = layout.profile
+        self.compress = compress
+
+    def page_content(self, cells):
+        """Returns the stream object body (dictionary and data) for one sheet."""
+        return self._stream(self.render_page(cells))
+
+    def _stream(self, content):
+        if self.compress:
+            content = zlib.compress(content, 6)
+            header = f'<< /Length {len(content)} /Filter /FlateDecode >>'
+        else:
+            header = f'<< /Length {len(content)} >>'
+        return header.encode('ascii') + b'\nstream\n' + content + b'\nendstream'
+
+    def render_page(self, cells):
+        """Returns the content stream for one sheet."""
+        profile = self.profile
+        ops = []
+
+        if profile.show_title:
+            title = 'ETIQUETAS DE PRECIOS'
+            size = 17
+            x = (PAGE_WIDTH_PT - text_width(title, size)) / 2
+            y = PAGE_HEIGHT_PT - (profile.page_margin + 1.3) * CM
+            ops.append(self._text_op(title, x, y, size, BORDER_COLOR))
+
+        for index in range(profile.labels_per_page):
+            if index < len(cells):
+                ops.append(self._label_ops(index, *cells[index]))
+            else:
+                ops.append(self._empty_label_ops(index))
+
+        return '\n'.join(ops).encode('cp1252', 'replace')
+
+    def render_mixed_page(self, labels):
+        """Content stream for a packed sheet of (layout, x, y, price_text, name, barcode) labels."""
+        ops = []
+        for layout, x, y, *cell in labels:
+            profile = layout.profile
+            box = (x * CM, PAGE_HEIGHT_PT - (y + profile.label_height) * CM,
+                   profile.label_width * CM, profile.label_height * CM)
+            ops.append(self._draw_label(layout, box, *cell))
+        return '\n'.join(ops).encode('cp1252', 'replace')
+
+    def mixed_page_content(self, labels):
+        return self._stream(self.render_mixed_page(labels))
+
+    def _label_ops(self, index, price_text, name, barcode=None):
+        return self._draw_label(self.layout, self._box_pt(index), price_text, name, barcode)
+
+    def _draw_label(self, layout, box, price_text, name, barcode=None):
+        x, y, width, height = box
+        profile = layout.profile
+        ops = [self._rounded_rect(x, y, width, height, BORDER_COLOR, fill=None, line_width=1.5)]
+
+        barcode = printable_barcode(barcode)
+        has_barcode = barcode is not None
+        price_size = layout.price_font_cm(price_text, has_barcode) * CM
+        name_font, name_lines = layout.name_fit(name, has_barcode)
+        name_size = name_font * CM
+
+        line_height = name_size * 1.3
+        gap = 0.3 * profile.scale * CM
+        block = price_size * 1.1 + gap + line_height * len(name_lines)
+        if has_barcode:
+            barcode_gap = 0.15 * profile.scale * CM
+            barcode_height = layout.barcode_height * CM
+            block += barcode_gap + barcode_height
+        baseline = y + height / 2 + block / 2 - price_size
+
+        price_x = x + (width - text_width(price_text, price_size)) / 2
+        ops.append(self._text_op(price_text, price_x, baseline, price_size, BORDER_COLOR))
+
+        baseline -= price_size * 0.1 + gap + name_size
+        for line in name_lines:
+            line_x = x + (width - text_width(line, name_size)) / 2
+            ops.append(self._text_op(line, line_x, baseline, name_size, NAME_COLOR))
+            baseline -= line_height
+
+        if has_barcode:
+            bars, bars_width = pdf_barcode_ops(barcode, layout.inner_width * CM, barcode_height)
+            bottom = y + height / 2 - block / 2
+            ops.append(f'q 1 0 0 1 {x + (width - bars_width) / 2:.2f} {bottom:.2f} cm {bars} Q')
+        return '\n'.join(ops)
+
+    def _empty_label_ops(self, index):
+        x, y, width, height = self._box_pt(index)
+        size = 0.38 * self.profile.scale * CM
+        ops = [
+            '[4 3] 0 d',
+            self._rounded_rect(x, y, width, height, EMPTY_BORDER, fill=EMPTY_FILL, line_width=1.5),
+            '[] 0 d',
+        ]
+        for i, line in enumerate(('Espacio', 'disponible')):
+            line_x = x + (width - text_width(line, size)) / 2
+            line_y = y + height / 2 + size * 0.2 - i * size * 1.2
+            ops.append(self._text_op(line, line_x, line_y, size, EMPTY_TEXT))
+        return '\n'.join(ops)
+
+    def _box_pt(self, index):
+        """Label box in PDF coordinates (origin at the bottom-left corner)."""
+        x, y, width, height = self.profile.cell_box(index)
+        return x * CM, PAGE_HEIGHT_PT - (y + height) * CM, width * CM, height * CM
+
+    @staticmethod
+    def _text_op(text, x, y, size, color):
+        return (f'BT {color[0]} {color[1]} {color[2]} rg /F1 {size:.2f} Tf '
+                f'{x:.2f} {y:.2f} Td {pdf_string(text)} Tj ET')
+
+    @staticmethod
+    def _rounded_rect(x, y, width, height, stroke, fill, line_width, radius=0.2 * CM):
+        k = radius * 0.5523  # Bezier control distance for a quarter circle
+        right, top = x + width, y + height
+        path = (
+            f'{x + radius:.2f} {y:.2f} m '
+            f'{right - radius:.2f} {y:.2f} l '
+            f'{right - radius + k:.2f} {y:.2f} {right:.2f} {y + radius - k:.2f} {right:.2f} {y + radius:.2f} c '
+            f'{right:.2f} {top - radius:.2f} l '
+            f'{right:.2f} {top - radius + k:.2f} {right - radius + k:.2f} {top:.2f} {right - radius:.2f} {top:.2f} c '
+            f'{x + radius:.2f} {top:.2f} l '
+            f'{x + radius - k:.2f} {top:.2f} {x:.2f} {top - radius + k:.2f} {x:.2f} {top - radius:.2f} c '
+            f'{x:.2f} {y + radius:.2f} l '
+            f'{x:.2f} {y + radius - k:.2f} {x + radius - k:.2f} {y:.2f} {x + radius:.2f} {y:.2f} c h'
+        )
+        color = f'{stroke[0]} {stroke[1]} {stroke[2]} RG {line_width} w '
+        if fill:
+            return f'{color}{fill[0]} {fill[1]} {fill[2]} rg {path} B'
+        return f'{color}{path} S'
+
+
+class PdfTagWriter:
+    """Streams tag pages into a binary file object as a PDF document."""
+
+    def __init__(self, stream, layout, compress=True):
+        self.stream = stream
+        self.renderer = PdfPageRenderer(layout, compress)
+        self.offsets = {}
+        self.page_ids = []
+        self.next_id = FONT_ID + 1
+        self.position = 0
+
+        self._write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        self._write_object(FONT_ID, (
+            f'<< /Type /Font /Subtype /Type1 /BaseFont /{FONT_NAME} '
+            f'/Encoding /WinAnsiEncoding >>'
+        ).encode('ascii'))
+
+    def add_page(self, cells):
+        """Writes one sheet. `cells` is a list of (price_text, name) tuples."""
+        self.add_page_content(self.renderer.page_content(cells))
+
+    def add_page_content(self, content):
+        """Writes one sheet from a content stream built by PdfPageRenderer."""
+        content_id = self._allocate()
+        self._write_object(content_id, content)
+
+        page_id = self._allocate()
+        self._write_object(page_id, (
+            f'<< /Type /Page /Parent {PAGES_ID} 0 R '
+            f'/MediaBox [0 0 {PAGE_WIDTH_PT:.2f} {PAGE_HEIGHT_PT:.2f}] '
+            f'/Resources << /Font << /F1 {FONT_ID} 0 R >> >> '
+            f'/Contents {content_id} 0 R >>'
+        ).encode('ascii'))
+        self.page_ids.append(page_id)
+
+    def close(self):
+        """Writes the page tree, catalog, cross-reference table and trailer."""
+        kids = ' '.join(f'{page_id} 0 R' for page_id in self.page_ids)
+        self._write_object(PAGES_ID, (
+            f'<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>'
+        ).encode('ascii'))
+        self._write_object(CATALOG_ID, f'<< /Type /Catalog /Pages {PAGES_ID} 0 R >>'.encode('ascii'))
+
+        xref_position = self.position
+        size = self.next_id
+        lines = [f'xref\n0 {size}\n', '0000000000 65535 f \n']
+        for object_id in range(1, size):
+            lines.append(f'{self.offsets[object_id]:010d} 00000 n \n')
+        lines.append(f'trailer\n<< /Size {size} /Root {CATALOG_ID} 0 R >>\n')
+        lines.append(f'startxref\n{xref_position}\n%%EOF\n')
+        self._write(''.join(lines).encode('ascii'))
+
+    def _allocate(self):
+        object_id = self.next_id
+        self.next_id += 1
+        return object_id
+
+    def _write_object(self, object_id, body):
+        self.offsets[object_id] = self.position
+        self._write(f'{object_id} 0 obj\n'.encode('ascii') + body + b'\nendobj\n')
+
+    def _write(self, data):
+        self.stream.write(data)
+        self.position += len(data)
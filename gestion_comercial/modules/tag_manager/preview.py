@@ -0,0 +1,182 @@
+"""
+In-app print preview for the tag manager.
+
+Draws the tag sheet on a Tk Canvas with the same layout geometry and
+text fitting as the HTML and PDF writers. Pages stay on the canvas once
+drawn (hidden while another page is shown), and each label remembers the
+price, name and barcode it was drawn with, so an edit only redraws the
+labels whose content changed.
+"""
+import tkinter as tk
+from collections import OrderedDict
+from gestion_comercial.config.theme import Theme
+from gestion_comercial.modules.tag_manager.layouts import PAGE_WIDTH, PAGE_HEIGHT
+from gestion_comercial.modules.tag_manager.formatting import price_text
+from gestion_comercial.modules.tag_manager.barcode import encode_barcode, printable_barcode, symbol_width
+
+PIXELS_PER_CM = 22
+PAGE_CACHE_SIZE = 8  # pages kept drawn on the canvas
+FONT_FAMILY = 'Helvetica'
+TITLE = 'ETIQUETAS DE PRECIOS'
+
+BORDER_COLOR = '#2c3e50'
+NAME_COLOR = '#34495e'
+EMPTY_BORDER = '#bdc3c7'
+EMPTY_FILL = '#f8f9fa'
+EMPTY_TEXT = '#95a5a6'
+
+
+def px(cm):
+    return cm * PIXELS_PER_CM
+
+
+def font(cm, weight='bold'):
+    # Negative sizes are pixels in Tk
+    return (FONT_FAMILY, -max(1, int(round(px(cm)))), weight)
+
+
+class TagPreview(tk.Toplevel):
+    """Preview window showing one tag sheet at a time."""
+
+    def __init__(self, master, layout, on_close=None):
+        super().__init__(master, bg=Theme.BACKGROUND)
+        self.title("Vista previa de etiquetas")
+        self.resizable(False, False)
+        self.on_close = on_close
+        self.layout = layout
+        self.cells = []
+        self.page = 0
+        self.visible_page = None
+        # page -> [(price_text, name, barcode) or None per label], in LRU order
+        self.pages = OrderedDict()
+
+        nav = tk.Frame(self, bg=Theme.BACKGROUND)
+        nav.pack(fill='x', pady=(8, 4))
+        tk.Button(nav, text="◀", font=Theme.FONTS['body'], relief='flat', bg='white',
+                  command=lambda: self.show_page(self.page - 1)).pack(side='left', padx=(10, 0))
+        tk.Button(nav, text="▶", font=Theme.FONTS['body'], relief='flat', bg='white',
+                  command=lambda: self.show_page(self.page + 1)).pack(side='right', padx=(0, 10))
+        self.page_label = tk.Label(nav, font=Theme.FONTS['body'], bg=Theme.BACKGROUND, fg='#6b7280')
+        self.page_label.pack()
+
+        self.canvas = tk.Canvas(self, width=px(PAGE_WIDTH), height=px(PAGE_HEIGHT),
+                                bg='white', highlightthickness=1, highlightbackground='#cbd5e1')
+        self.canvas.pack(padx=10, pady=(0, 10))
+
+        for sequence in ('<Prior>', '<Left>'):
+            self.bind(sequence, lambda e: self.show_page(self.page - 1))
+        for sequence in ('<Next>', '<Right>'):
+            self.bind(sequence, lambda e: self.show_page(self.page + 1))
+        self.protocol('WM_DELETE_WINDOW', self.close)
+
+    # Data
+    def set_layout(self, layout):
+        """Switches the label stock; every cached page is dropped."""
+        if layout is self.layout:
+            return
+        self.layout = layout
+        self.canvas.delete('all')
+        self.pages.clear()
+        self.visible_page = None
+        self.show_page(self.page)
+
+    def update_products(self, products):
+        """Takes the current product list and refreshes the visible page."""
+        self.cells = [(price_text(p['price']), p['name'], p.get('barcode')) for p in products]
+        self.show_page(self.page)
+
+    def page_count(self):
+        return max(1, -(-len(self.cells) // self.layout.labels_per_page))
+
+    # Drawing
+    def show_page(self, page):
+        page = max(0, min(self.page_count() - 1, page))
+        if self.visible_page is not None and self.visible_page != page:
+            self.canvas.itemconfigure(f'page{self.visible_page}', state='hidden')
+        self.page = page
+
+        drawn = self.pages.get(page)
+        if drawn is None:
+            drawn = self.pages[page] = [False] * self.layout.labels_per_page
+            self.draw_sheet(page)
+            while len(self.pages) > PAGE_CACHE_SIZE:
+                old_page, _ = self.pages.popitem(last=False)
+                self.canvas.delete(f'page{old_page}')
+        else:
+            self.pages.move_to_end(page)
+            self.canvas.itemconfigure(f'page{page}', state='normal')
+        self.visible_page = page
+
+        per_page = self.layout.labels_per_page
+        start = page * per_page
+        for slot in range(per_page):
+            index = start + slot
+            cell = self.cells[index] if index < len(self.cells) else None
+            if drawn[slot] != cell:
+                self.canvas.delete(f'p{page}l{slot}')
+                self.draw_label(page, slot, cell)
+                drawn[slot] = cell
+
+        self.page_label.config(text=f"Página {page + 1} de {self.page_count()}  ·  {len(self.cells)} etiquetas")
+
+    def draw_sheet(self, page):
+        if self.layout.profile.show_title:
+            self.canvas.create_text(
+                px(PAGE_WIDTH / 2), px(self.layout.profile.page_margin + 1.1), text=TITLE,
+                font=font(0.6), fill=BORDER_COLOR, tags=(f'page{page}',)
+            )
+
+    def draw_label(self, page, slot, cell):
+        profile = self.layout.profile
+        x, y, width, height = profile.cell_box(slot)
+        tags = (f'page{page}', f'p{page}l{slot}')
+        center = px(x + width / 2)
+
+        if cell is None:
+            self.canvas.create_rectangle(px(x), px(y), px(x + width), px(y + height),
+                                         outline=EMPTY_BORDER, fill=EMPTY_FILL, dash=(4, 3), tags=tags)
+            size = 0.38 * profile.scale
+            self.canvas.create_text(center, px(y + height / 2), text="Espacio\ndisponible", justify='center',
+                                    font=font(size, 'italic'), fill=EMPTY_TEXT, tags=tags)
+            return
+
+        price, name, barcode = cell
+        self.canvas.create_rectangle(px(x), px(y), px(x + width), px(y + height),
+                                     outline=BORDER_COLOR, width=2, tags=tags)
+
+        barcode = printable_barcode(barcode)
+        has_barcode = barcode is not None
+        price_size = self.layout.price_font_cm(price, has_barcode)
+        name_size, lines = self.layout.name_fit(name, has_barcode)
+        line_height = name_size * 1.3
+        gap = 0.3 * profile.scale
+        block = price_size * 1.1 + gap + line_height * len(lines)
+        if has_barcode:
+            block += 0.15 * profile.scale + self.layout.barcode_height
+        top = y + (height - block) / 2
+
+        self.canvas.create_text(center, px(top), text=price, anchor='n',
+                                font=font(price_size), fill=BORDER_COLOR, tags=tags)
+        line_top = top + price_size * 1.1 + gap
+        for line in lines:
+            self.canvas.create_text(center, px(line_top), text=line, anchor='n',
+                                    font=font(name_size), fill=NAME_COLOR, tags=tags)
+            line_top += line_height
+
+        if has_barcode:
+            self.draw_barcode(barcode, center, line_top + 0.15 * profile.scale, tags)
+
+    def draw_barcode(self, code, center, top, tags):
+        symbol = encode_barcode(code)
+        width = symbol_width(symbol, self.layout.inner_width)
+        module = width / symbol.modules
+        left = center - px(width / 2)
+        bottom = px(top + self.layout.barcode_height)
+        for start, bar in symbol.runs:
+            self.canvas.create_rectangle(left + px(start * module), px(top), left + px((start + bar) * module), bottom,
+                                         fill='black', width=0, tags=tags)
+
+    def close(self):
+        if self.on_close is not None:
+            self.on_close()
+        self.destroy()
@@ -0,0 +1,141 @@
+"""
+Background print pipeline for the tag manager.
+
+Print jobs run on a worker thread so document generation, the call to
+the system opener and network sends never block the Tk event loop. The
+view collects progress and completion events by polling with `after`.
+"""
+import itertools
+import queue
+import threading
+from gestion_comercial.modules.tag_manager.layouts import DEFAULT_LAYOUT
+from gestion_comercial.modules.tag_manager.model import TagManagerModel, DOCUMENT_FORMATS
+from gestion_comercial.modules.tag_manager.batch import ProductBatch
+from gestion_comercial.modules.tag_manager.spooler import PrintSpooler, PrinterJob
+
+PROGRESS_EVERY = 500  # products between progress events
+
+_job_ids = itertools.count(1)
+
+
+class PrintJob:
+    """A batch of products to print and its current state."""
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    def __init__(self, products, output_format='html', only_changed=False, layout=DEFAULT_LAYOUT, printer=None):
+        self.id = next(_job_ids)
+        self.products = products
+        self.output_format = output_format
+        self.only_changed = only_changed
+        self.layout = layout
+        self.printer = printer  # printer URI for thermal formats
+        self.status = PrintJob.PENDING
+        self.processed = 0  # products read so far, for progress
+        self.printed = 0  # labels in the finished document
+        self.skipped_barcodes = []  # invalid codes, printed without a barcode
+        self.result = None
+
+    @property
+    def finished(self):
+        return self.status in (PrintJob.DONE, PrintJob.FAILED)
+
+
+class PrintJobQueue:
+    """Serves print jobs in order on a single worker thread.
+
+    The worker owns its own TagManagerModel (and therefore its own SQLite
+    connection); the UI thread only touches the job objects it receives
+    through poll().
+    """
+
+    def __init__(self, model_factory=TagManagerModel, spooler=None):
+        self.model_factory = model_factory
+        self.spooler = spooler
+        self.jobs = queue.Queue()
+        self.events = queue.Queue()
+        self.thread = None
+        self.pending = 0
+
+    def submit(self, job):
+        """Queues a job and returns it. Starts the worker on first use."""
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, name='tag-print-worker', daemon=True)
+            self.thread.start()
+        self.pending += 1
+        self.jobs.put(job)
+        return job
+
+    def poll(self):
+        """Returns the (event, job) pairs produced since the last call."""
+        events = []
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] in (PrintJob.DONE, PrintJob.FAILED):
+                self.pending -= 1
+            events.append(event)
+        return events
+
+    @property
+    def busy(self):
+        return self.pending > 0
+
+    def stop(self):
+        """Lets the worker finish the queued jobs and exit."""
+        if self.thread is not None:
+            self.jobs.put(None)
+
+    def _run(self):
+        # Created with the first job; if that fails the job fails and the next one tries again
+        model = None
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                if model is not None:
+                    model.close()
+                return
+
+            job.status = PrintJob.RUNNING
+            self.events.put((PrintJob.RUNNING, job))
+            # Lists are passed as-is so identical sheets can be reused from the spool
+            products = job.products
+            if not isinstance(products, (list, tuple, ProductBatch)):
+                products = self._track_progress(job)
+            try:
+                if model is None:
+                    model = self.model_factory()
+                model.set_layout(job.layout)
+                success, result, job.printed = model.print_tags(products, job.output_format, job.only_changed)
+                job.skipped_barcodes = model.skipped_barcodes
+            except Exception as e:
+                success, result = False, str(e)
+
+            if success and job.printer and job.output_format not in DOCUMENT_FORMATS:
+                success, result = self._send_to_printer(job, result)
+
+            if isinstance(job.products, (list, tuple, ProductBatch)):
+                job.processed = len(job.products)
+            job.result = result
+            job.status = PrintJob.DONE if success else PrintJob.FAILED
+            self.events.put((job.status, job))
+
+    def _send_to_printer(self, job, path):
+        spooler = self.spooler or PrintSpooler.default()
+        sent = spooler.submit(job.printer, path=path)
+        sent.done.wait()
+        if sent.status == PrinterJob.FAILED:
+            return False, f"No se pudo enviar a la impresora {job.printer}: {sent.error}"
+        return True, path
+
+    def _track_progress(self, job):
+        for product in job.products:
+            yield product
+            job.processed += 1
+            if job.processed % PROGRESS_EVERY == 0:
+                self.events.put(('progress', job))
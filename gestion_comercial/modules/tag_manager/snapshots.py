@@ -0,0 +1,102 @@
+"""
+Printed-price snapshots for incremental reprints.
+
+Keeps the last printed price of every product (by SKU, or by normalized
+name when there is no SKU) so a supplier update only reprints the tags
+whose price actually changed.
+"""
+import os
+import sqlite3
+from datetime import datetime
+from itertools import islice
+from gestion_comercial.config.settings import Settings
+
+DB_NAME = 'printed_prices.db'
+LOOKUP_BATCH = 500  # Stays below SQLite's bound parameter limit
+
+
+def product_key(product):
+    """Stable snapshot key: the SKU if present, else the normalized name."""
+    sku = product.get('sku')
+    if sku:
+        return f"sku:{sku}"
+    return "name:" + ' '.join(product['name'].split()).casefold()
+
+
+def printed_price(price):
+    """Price as it appears on the tag (integer pesos)."""
+    return int(round(price))
+
+
+class PriceSnapshotStore:
+    """SQLite store of the prices printed on the shelf."""
+
+    def __init__(self, path=None):
+        if path is None:
+            os.makedirs(Settings.DATA_DIR, exist_ok=True)
+            path = os.path.join(Settings.DATA_DIR, DB_NAME)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS printed_prices (
+                key TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                price INTEGER NOT NULL,
+                printed_at TEXT NOT NULL
+            ) WITHOUT ROWID
+        """)
+        self.conn.commit()
+
+    def track(self, products, only_changed=False):
+        """
+        Yields the products to print and stages their prices as printed.
+
+        With `only_changed`, products whose printed price matches the
+        snapshot are skipped. Staged prices become the new snapshot on
+        commit(); call rollback() if the document could not be produced.
+        """
+        printed_at = datetime.now().isoformat(timespec='seconds')
+        iterator = iter(products)
+        while True:
+            batch = list(islice(iterator, LOOKUP_BATCH))
+            if not batch:
+                return
+
+            keys = [product_key(p) for p in batch]
+            if only_changed:
+                known = self.lookup(keys)
+                selected = [
+                    (key, p) for key, p in zip(keys, batch)
+                    if known.get(key) != printed_price(p['price'])
+                ]
+            else:
+                selected = list(zip(keys, batch))
+
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO printed_prices (key, name, price, printed_at) VALUES (?, ?, ?, ?)",
+                [(key, p['name'], printed_price(p['price']), printed_at) for key, p in selected]
+            )
+            for _, product in selected:
+                yield product
+
+    def lookup(self, keys):
+        """Returns {key: printed price} for the keys present in the snapshot."""
+        placeholders = ','.join('?' * len(keys))
+        rows = self.conn.execute(
+            f"SELECT key, price FROM printed_prices WHERE key IN ({placeholders})", keys
+        )
+        return dict(rows)
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+    def clear(self):
+        """Forgets every printed price, so the next print is a full one."""
+        self.conn.execute("DELETE FROM printed_prices")
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
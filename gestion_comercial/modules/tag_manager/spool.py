@@ -0,0 +1,183 @@
+"""
+Spool directory for generated tag documents.
+
+Documents are stored under a name derived from their content hash, so an
+identical sheet is produced only once. The directory is capped in size
+with least-recently-used eviction, and leftovers from previous runs are
+swept on startup instead of leaking in the temp directory.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+SPOOL_DIR = os.path.join(tempfile.gettempdir(), 'gestion_comercial_spool')
+MAX_SPOOL_BYTES = 200 * 1024 * 1024
+MAX_AGE_SECONDS = 7 * 24 * 3600
+PART_SUFFIX = '.part'
+
+
+def content_key(*parts):
+    """Hashes JSON-serializable inputs into a spool key."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(json.dumps(part, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class SpoolEntry:
+    """File-like writer for a new spool document.
+
+    Accepts both str and bytes; the content is hashed while it is written.
+    """
+
+    def __init__(self, spool, suffix, key=None):
+        self.spool = spool
+        self.suffix = suffix
+        self.key = key
+        self.path = None
+        self.cancelled = False
+        self._hash = hashlib.sha256()
+        self._part_path = os.path.join(spool.directory, uuid.uuid4().hex + PART_SUFFIX)
+        self._file = open(self._part_path, 'wb')
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self._hash.update(data)
+        self._file.write(data)
+        return len(data)
+
+    def cancel(self):
+        """Discards the document when the writer is closed."""
+        self.cancelled = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._file.close()
+        if exc_type is not None or self.cancelled:
+            self.spool.remove(self._part_path)
+            return False
+        self.path = self.spool.commit(self._part_path, (self.key or self._hash.hexdigest()) + self.suffix)
+        return False
+
+
+class SpoolManager:
+    """Size-capped, content-addressed store of generated documents."""
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, directory=SPOOL_DIR, max_bytes=MAX_SPOOL_BYTES, max_age=MAX_AGE_SECONDS):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # file name -> size, least recently used first
+        self.total_bytes = 0
+        os.makedirs(directory, exist_ok=True)
+        self.sweep()
+
+    @classmethod
+    def default(cls):
+        """Process-wide spool; the first call sweeps orphans from earlier runs."""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    def sweep(self):
+        """Removes partial and expired files and rebuilds the LRU index."""
+        now = time.time()
+        found = []
+        for entry in os.scandir(self.directory):
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+            if entry.name.endswith(PART_SUFFIX) or now - stat.st_mtime > self.max_age:
+                self.remove(entry.path)
+            else:
+                found.append((stat.st_mtime, entry.name, stat.st_size))
+
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+            for _, name, size in sorted(found):
+                self.entries[name] = size
+                self.total_bytes += size
+        self.evict()
+
+    def create(self, suffix, key=None):
+        """Starts a new document. Use as a context manager."""
+        return SpoolEntry(self, suffix, key)
+
+    def lookup(self, key, suffix):
+        """Returns the path of a spooled document and marks it as recently used."""
+        name = key + suffix
+        path = os.path.join(self.directory, name)
+        with self.lock:
+            if name not in self.entries:
+                return None
+            if not os.path.exists(path):
+                self.total_bytes -= self.entries.pop(name)
+                return None
+            self.entries.move_to_end(name)
+        self._touch(path)
+        return path
+
+    def commit(self, part_path, name):
+        """Moves a finished part file into place, reusing an identical document."""
+        path = os.path.join(self.directory, name)
+        with self.lock:
+            if name in self.entries and os.path.exists(path):
+                self.entries.move_to_end(name)
+                reused = True
+            else:
+                os.replace(part_path, path)
+                size = os.path.getsize(path)
+                self.total_bytes += size - self.entries.pop(name, 0)
+                self.entries[name] = size
+                reused = False
+
+        if reused:
+            self.remove(part_path)
+            self._touch(path)
+        self.evict(keep=name)
+        return path
+
+    def evict(self, keep=None):
+        """Deletes least recently used documents until the spool fits its cap."""
+        with self.lock:
+            victims = []
+            for name in list(self.entries):
+                if self.total_bytes <= self.max_bytes:
+                    break
+                if name == keep:
+                    continue
+                self.total_bytes -= self.entries.pop(name)
+                victims.append(name)
+
+        for name in victims:
+            self.remove(os.path.join(self.directory, name))
+
+    @staticmethod
+    def remove(path):
+        try:
+            os.unlink(path)
+        except OSError:
+            # Missing, or still open in a viewer (Windows); retried on the next sweep
+            pass
+
+    @staticmethod
+    def _touch(path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
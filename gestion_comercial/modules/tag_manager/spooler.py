@@ -0,0 +1,395 @@
+"""
+Network print spooler for tag documents.
+
+Sends generated documents (usually ZPL or ESC/POS) to network printers
+over raw TCP (port 9100) or LPR. Queued jobs for the same printer are
+sent as one batch, and failed sends are retried with exponential
+backoff. A raw connection is reused while jobs keep coming and closed
+cleanly once the queue drains; a job only counts as sent once the
+printer confirmed it by closing its side. A retry resends only the jobs
+that had not been handed to the connection whole, so an interrupted
+batch does not print its first labels twice.
+"""
+import bisect
+import itertools
+import queue
+import select
+import socket
+import threading
+import time
+from urllib.parse import urlparse
+
+RAW_PORT = 9100
+LPR_PORT = 515
+MAX_BATCH_JOBS = 50
+MAX_BATCH_BYTES = 4 * 1024 * 1024
+RAW_IDLE_TIMEOUT = 5.0  # seconds; printers drop idle raw connections
+READ_SIZE = 4096
+
+_job_ids = itertools.count(1)
+
+
+class PrinterError(Exception):
+    """Raised when a printer rejects or drops a transfer."""
+
+
+def parse_printer_uri(uri):
+    """
+    Parses 'raw://host:9100', 'lpr://host/queue' or a plain 'host[:port]'.
+
+    Returns:
+        tuple: (protocol, host, port, queue_name)
+    """
+    if '://' not in uri:
+        uri = 'raw://' + uri
+    parsed = urlparse(uri)
+    protocol = parsed.scheme.lower()
+    if protocol not in ('raw', 'lpr') or not parsed.hostname:
+        raise ValueError(f"Impresora no válida: {uri}")
+    default_port = RAW_PORT if protocol == 'raw' else LPR_PORT
+    queue_name = parsed.path.strip('/') or 'lp'
+    return protocol, parsed.hostname, parsed.port or default_port, queue_name
+
+
+class PrinterJob:
+    """A document queued for a printer."""
+
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+
+    def __init__(self, printer, data=None, path=None):
+        self.id = next(_job_ids)
+        self.printer = printer
+        self.data = data
+        self.path = path
+        self.status = PrinterJob.PENDING
+        self.error = None
+        self.attempts = 0
+        self.done = threading.Event()
+
+    def payload(self):
+        if self.data is None:
+            with open(self.path, 'rb') as f:
+                self.data = f.read()
+        return self.data
+
+    def finish(self, status, error=None):
+        self.status = status
+        self.error = error
+        if self.path:
+            self.data = None  # Re-read from the spool if sent again
+        self.done.set()
+
+
+class PrinterConnection:
+    """
+    Connection to one printer.
+
+    A raw socket stays open while more jobs are already queued, and is then
+    closed cleanly: the printer closing its side after our shutdown confirms
+    it read everything. Until then the jobs sent on it are unconfirmed.
+    Jobs whose outcome became known (delivered or lost) are collected for
+    take_settled().
+    """
+
+    def __init__(self, uri, timeout=10):
+        self.uri = uri
+        self.protocol, self.host, self.port, self.queue_name = parse_printer_uri(uri)
+        self.timeout = timeout
+        self.sock = None
+        self.last_used = 0.0
+        self.unconfirmed = []
+        self.delivered = []
+        self.lost = []
+
+    def send_batch(self, group, keep_open=False):
+        """Sends (job, payload) pairs; raises OSError or PrinterError if the transfer fails."""
+        if self.protocol == 'raw':
+            self._send_raw(group, keep_open)
+            return
+        try:
+            self._send_lpr([payload for _, payload in group])
+        except (OSError, PrinterError):
+            # An LPR job the daemon did not receive to the end is discarded whole
+            self.lost.extend(group)
+            raise
+        self.delivered.extend(group)
+
+    def take_settled(self):
+        """Returns the (delivered, lost) pairs settled since the last call."""
+        settled = self.delivered, self.lost
+        self.delivered, self.lost = [], []
+        return settled
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def _send_raw(self, group, keep_open):
+        if self.sock is not None and not self._reusable():
+            self.release()
+        if self.sock is None:
+            self.sock = self._connect()
+        data = memoryview(b''.join(payload for _, payload in group))
+        ends = list(itertools.accumulate(len(payload) for _, payload in group))
+        offset = 0
+        try:
+            while offset < len(data):
+                offset += self.sock.send(data[offset:])
+        except OSError:
+            # Jobs the socket took whole are not sent again, so they never print twice
+            whole = bisect.bisect_right(ends, offset)
+            self.delivered.extend(self.unconfirmed + group[:whole])
+            self.lost.extend(group[whole:])
+            self.unconfirmed = []
+            self.close()
+            raise
+        self.unconfirmed.extend(group)
+        self.last_used = time.monotonic()
+        if not keep_open and not self.release():
+            raise PrinterError("La impresora cerró la conexión sin confirmar la recepción")
+
+    def _reusable(self):
+        """Whether the open socket can take more data: not idle too long, not closed by the printer."""
+        if time.monotonic() - self.last_used > RAW_IDLE_TIMEOUT:
+            return False
+        try:
+            ready, _, _ = select.select([self.sock], [], [], 0)
+            # Readable means status bytes (discarded) or the printer's end of stream
+            return not ready or bool(self.sock.recv(READ_SIZE))
+        except OSError:
+            return False
+
+    def release(self):
+        """
+        Shuts the raw socket down and waits for the printer to close its side.
+
+        Returns:
+            bool: Whether the printer confirmed the unconfirmed jobs; if not
+            they are reported lost
+        """
+        sock, self.sock = self.sock, None
+        unconfirmed, self.unconfirmed = self.unconfirmed, []
+        if sock is None:
+            return True
+        try:
+            sock.shutdown(socket.SHUT_WR)
+            while sock.recv(READ_SIZE):
+                pass
+        except OSError:
+            self.lost.extend(unconfirmed)
+            return False
+        finally:
+            sock.close()
+        self.delivered.extend(unconfirmed)
+        return True
+
+    def _send_lpr(self, payloads):
+        """RFC 1179 'receive job' with one data file per payload."""
+        job_number = next(_job_ids) % 1000
+        host = socket.gethostname()[:31] or 'gestion'
+        with self._connect() as sock:
+            self._lpr_command(sock, b'\x02' + self.queue_name.encode('ascii') + b'\n')
+
+            control = [f"H{host}\n", "Pgestion\n"]
+            for index, payload in enumerate(payloads):
+                name = f"df{chr(65 + index // 26)}{chr(65 + index % 26)}{job_number:03d}{host}"
+                self._lpr_command(sock, f"\x03{len(payload)} {name}\n".encode('ascii'))
+                self._lpr_command(sock, payload + b'\x00')
+                control.append(f"l{name}\n")
+
+            control_data = ''.join(control).encode('ascii', 'replace')
+            self._lpr_command(sock, f"\x02{len(control_data)} cfA{job_number:03d}{host}\n".encode('ascii'))
+            self._lpr_command(sock, control_data + b'\x00')
+
+    @staticmethod
+    def _lpr_command(sock, data):
+        sock.sendall(data)
+        ack = sock.recv(1)
+        if ack != b'\x00':
+            raise PrinterError(f"La impresora rechazó el trabajo (respuesta {ack!r})")
+
+    def close(self):
+        """Drops the socket without waiting for the printer."""
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+            self.sock = None
+
+
+class PrintSpooler:
+    """Serves printer jobs on a background thread with batching and retries."""
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, retries=4, backoff=0.5, max_backoff=8.0, timeout=10):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.jobs = queue.Queue()
+        self.connections = {}
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stats = {'jobs': 0, 'bytes': 0, 'failed': 0, 'batches': 0, 'retries': 0, 'seconds': 0.0}
+
+    @classmethod
+    def default(cls):
+        """Process-wide spooler, so printer connections outlive the views."""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    def submit(self, printer, data=None, path=None):
+        """Queues raw bytes or a spooled file for a printer URI."""
+        job = PrinterJob(printer, data=data, path=path)
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='tag-printer-spooler', daemon=True)
+                self.thread.start()
+        self.jobs.put(job)
+        return job
+
+    def metrics(self):
+        """Returns counters plus jobs/second and bytes/second of send time."""
+        with self.lock:
+            stats = dict(self.stats)
+        seconds = stats['seconds'] or 1e-9
+        stats['jobs_per_second'] = stats['jobs'] / seconds
+        stats['bytes_per_second'] = stats['bytes'] / seconds
+        return stats
+
+    def stop(self):
+        """Sends the queued jobs, then closes every connection."""
+        if self.thread is not None and self.thread.is_alive():
+            self.jobs.put(None)
+            self.thread.join()
+
+    def _run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            batches, stop = self._collect_batches(job)
+            for printer, batch in batches.items():
+                self._send_with_retry(printer, batch)
+            if stop:
+                break
+            if self.jobs.empty():
+                self._release_connections()
+
+        self._release_connections()
+        self.connections.clear()
+
+    def _release_connections(self):
+        """Closes the open sockets cleanly, confirming their jobs; lost ones are sent again."""
+        for connection in self.connections.values():
+            if connection.sock is None:
+                continue
+            start = time.perf_counter()
+            connection.release()
+            lost = self._settle(connection, time.perf_counter() - start)
+            if lost:
+                self._send_group(connection, lost)
+
+    def _collect_batches(self, first):
+        """Groups the jobs already waiting in the queue by printer."""
+        batches = {first.printer: [first]}
+        count = 1
+        while count < MAX_BATCH_JOBS:
+            try:
+                job = self.jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                return batches, True
+            batches.setdefault(job.printer, []).append(job)
+            count += 1
+        return batches, False
+
+    def _send_with_retry(self, printer, batch):
+        try:
+            connection = self.connections.get(printer)
+            if connection is None:
+                connection = self.connections[printer] = PrinterConnection(printer, self.timeout)
+        except ValueError as e:
+            self._fail(batch, str(e))
+            return
+
+        # A job whose spool file is gone fails alone; the rest are still sent
+        loaded = []
+        for job in batch:
+            try:
+                loaded.append((job, job.payload()))
+            except OSError as e:
+                self._fail([job], str(e))
+        if not loaded:
+            return
+
+        # Split oversized batches so one transfer stays bounded
+        groups, group, size = [], [], 0
+        for job, payload in loaded:
+            if group and size + len(payload) > MAX_BATCH_BYTES:
+                groups.append(group)
+                group, size = [], 0
+            group.append((job, payload))
+            size += len(payload)
+        groups.append(group)
+
+        # The socket stays open between groups and while more jobs are queued
+        for i, group in enumerate(groups, 1):
+            self._send_group(connection, group, keep_open=i < len(groups) or not self.jobs.empty())
+
+    def _send_group(self, connection, group, keep_open=False):
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            for job, _ in group:
+                job.attempts += 1
+            start = time.perf_counter()
+            error = None
+            try:
+                connection.send_batch(group, keep_open)
+            except (OSError, PrinterError) as e:
+                connection.close()
+                error = e
+            # Lost jobs may include earlier ones the printer dropped with an idle socket
+            group = self._settle(connection, time.perf_counter() - start)
+            if not group:
+                return
+            if attempt == self.retries:
+                self._fail([job for job, _ in group], str(error or "conexión perdida"))
+                return
+            with self.lock:
+                self.stats['retries'] += 1
+            if error is not None:
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_backoff)
+
+    def _settle(self, connection, elapsed):
+        """Finishes the jobs the connection confirmed; returns the lost ones."""
+        delivered, lost = connection.take_settled()
+        self._sent(delivered, elapsed)
+        return lost
+
+    def _sent(self, group, elapsed):
+        if not group:
+            return
+        with self.lock:
+            self.stats['jobs'] += len(group)
+            self.stats['bytes'] += sum(len(payload) for _, payload in group)
+            self.stats['batches'] += 1
+            self.stats['seconds'] += elapsed
+        for job, _ in group:
+            job.finish(PrinterJob.SENT)
+
+    def _fail(self, jobs, error):
+        with self.lock:
+            self.stats['failed'] += len(jobs)
+        for job in jobs:
+            job.finish(PrinterJob.FAILED, error)
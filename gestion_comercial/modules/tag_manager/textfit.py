@@ -0,0 +1,96 @@
+"""
+Font-metric based text fitting for labels.
+
+Uses the glyph advance widths in fontmetrics to pick the largest font
+size that fits a label box and to wrap product names. Text width is
+linear in the font size, so fitting is a division, not a search. All
+results are memoized per (text, box) so reprinting a catalog is cheap.
+"""
+from functools import lru_cache
+from itertools import repeat
+from gestion_comercial.modules.tag_manager.fontmetrics import WIDTHS, DEFAULT_WIDTH
+
+FIT_CACHE_SIZE = 16384
+SIZE_STEP = 0.01  # cm
+ELLIPSIS = '...'
+
+
+@lru_cache(maxsize=FIT_CACHE_SIZE)
+def text_units(text):
+    """Advance width of `text` in 1/1000 em."""
+    return sum(map(WIDTHS.get, text, repeat(DEFAULT_WIDTH)))
+
+
+def _floor_step(size):
+    return int(size / SIZE_STEP + 1e-9) * SIZE_STEP
+
+
+@lru_cache(maxsize=FIT_CACHE_SIZE)
+def fit_font_size(text, box_width, max_size, min_size):
+    """Largest size in [min_size, max_size] at which `text` fits on one line."""
+    units = text_units(text)
+    if not units:
+        return max_size
+    size = _floor_step(box_width * 1000.0 / units)
+    return round(max(min_size, min(max_size, size)), 2)
+
+
+@lru_cache(maxsize=FIT_CACHE_SIZE)
+def wrap_lines(text, size, box_width, max_lines):
+    """Greedy word wrap at `size`; returns (lines, fits) with an ellipsized last line if needed."""
+    limit = box_width * 1000.0 / size  # box width in font units
+    lines = []
+    widest = 0
+    current = ''
+    current_units = 0
+    space = WIDTHS[' ']
+    for word in text.split():
+        units = text_units(word)
+        if current and current_units + space + units > limit:
+            lines.append(current)
+            widest = max(widest, current_units)
+            current, current_units = word, units
+        elif current:
+            current += ' ' + word
+            current_units += space + units
+        else:
+            current, current_units = word, units
+    if current:
+        lines.append(current)
+        widest = max(widest, current_units)
+
+    fits = len(lines) <= max_lines and widest <= limit
+    if fits:
+        return tuple(lines), True
+
+    lines = lines[:max_lines]
+    last = lines[-1]
+    if len(lines) == max_lines and text.split() != ' '.join(lines).split():
+        last += ELLIPSIS
+    while text_units(last) > limit and len(last) > len(ELLIPSIS):
+        last = last.rstrip('.').rstrip()[:-1].rstrip() + ELLIPSIS
+    lines[-1] = last
+    return tuple(lines), False
+
+
+@lru_cache(maxsize=FIT_CACHE_SIZE)
+def fit_lines(text, box_width, max_size, min_size, max_lines):
+    """
+    Fits a product name into at most `max_lines` lines.
+
+    Returns:
+        tuple: (font size, lines). The size shrinks down to `min_size`
+        before the text is ellipsized.
+    """
+    # Text can never fit in fewer line-widths than its total advance width
+    units = text_units(text)
+    if units:
+        size = min(max_size, _floor_step(box_width * 1000.0 * max_lines / units))
+    else:
+        size = max_size
+    size = round(max(min_size, size), 2)
+    while True:
+        lines, fits = wrap_lines(text, size, box_width, max_lines)
+        if fits or size <= min_size:
+            return size, lines
+        size = round(max(min_size, size - 0.02), 2)
@@ -0,0 +1,109 @@
+"""
+Thermal printer output for price tags.
+
+Generates ZPL for Zebra-style label printers and ESC/POS for receipt
+printers straight from the product list. Each label template is compiled
+once per layout, so every additional label is a single string format.
+Writers accept any binary stream: a file, or `socket.makefile('wb')`.
+"""
+from functools import lru_cache
+from gestion_comercial.modules.tag_manager.layouts import compile_layout
+
+DEFAULT_DPI = 203  # 8 dots/mm, the usual thermal head
+
+# ESC/POS commands
+ESC_INIT = b'\x1b@'
+ESC_CODEPAGE_1252 = b'\x1bt\x10'
+ESC_CENTER = b'\x1ba\x01'
+ESC_BOLD_ON = b'\x1bE\x01'
+ESC_BOLD_OFF = b'\x1bE\x00'
+GS_SIZE_NORMAL = b'\x1d!\x00'
+GS_SIZE_DOUBLE = b'\x1d!\x11'
+GS_SIZE_TRIPLE = b'\x1d!\x22'
+GS_PARTIAL_CUT = b'\x1dV\x42\x00'
+
+
+def zpl_field(text):
+    """Escapes field data for ^FH (hex escapes with '_')."""
+    return text.replace('_', '_5F').replace('^', '_5E').replace('~', '_7E')
+
+
+class ZplTemplate:
+    """ZPL label format compiled for one layout and print head resolution."""
+
+    def __init__(self, layout_key, dpi):
+        layout = compile_layout(layout_key)
+        profile = layout.profile
+        self.layout = layout
+        self.dots_per_cm = dpi / 2.54
+
+        width = self.dots(profile.label_width)
+        height = self.dots(profile.label_height)
+        pad = self.dots(profile.padding)
+        inner = width - 2 * pad
+        name_height = self.dots(profile.name_font)
+        name_y = height - pad - name_height * profile.name_lines
+
+        # {0}: price font height in dots, {1}: price, {2}: name
+        self.template = (
+            f"^XA^CI28^PW{width}^LL{height}^LH0,0"
+            f"^FO{pad},{pad}^A0N,{{0}},{{0}}^FB{inner},1,0,C^FH^FD{{1}}^FS"
+            f"^FO{pad},{name_y}^A0N,{name_height},{name_height}"
+            f"^FB{inner},{profile.name_lines},0,C^FH^FD{{2}}^FS"
+            f"^XZ\n"
+        )
+
+    def dots(self, cm):
+        return int(round(cm * self.dots_per_cm))
+
+    def render(self, price_text, name):
+        price_height = self.dots(self.layout.price_font_cm(price_text))
+        return self.template.format(price_height, zpl_field(price_text), zpl_field(name))
+
+
+@lru_cache(maxsize=None)
+def compile_zpl(layout_key, dpi=DEFAULT_DPI):
+    return ZplTemplate(layout_key, dpi)
+
+
+class ZplLabelWriter:
+    """Writes one ZPL label format per product."""
+
+    def __init__(self, stream, layout, dpi=DEFAULT_DPI):
+        self.stream = stream
+        self.template = compile_zpl(layout.key, dpi)
+
+    def add_label(self, price_text, name):
+        self.stream.write(self.template.render(price_text, ' '.join(name.split())).encode('utf-8'))
+
+    def close(self):
+        pass
+
+
+class EscPosLabelWriter:
+    """Writes receipt-style tags: big centered price, bold name, partial cut."""
+
+    def __init__(self, stream, layout, cut=True):
+        self.stream = stream
+        self.suffix = b'\n\n\n' + (GS_PARTIAL_CUT if cut else b'')
+        # Labels wider than 5cm get the triple size price
+        self.price_size = GS_SIZE_TRIPLE if layout.profile.label_width >= 5 else GS_SIZE_DOUBLE
+        stream.write(ESC_INIT + ESC_CODEPAGE_1252 + ESC_CENTER)
+
+    def add_label(self, price_text, name):
+        # Control characters would be read as printer commands
+        name = ''.join(char for char in name if char >= ' ')
+        self.stream.write(
+            self.price_size + price_text.encode('cp1252', 'replace') + b'\n'
+            + GS_SIZE_NORMAL + ESC_BOLD_ON + name.encode('cp1252', 'replace') + ESC_BOLD_OFF
+            + self.suffix
+        )
+
+    def close(self):
+        pass
+
+
+THERMAL_WRITERS = {
+    'zpl': ZplLabelWriter,
+    'escpos': EscPosLabelWriter,
+}
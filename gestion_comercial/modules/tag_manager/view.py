@@ -1,19 +1,42 @@
+import sqlite3
 import tkinter as tk
-from tkinter import messagebox
-import re
+from tkinter import messagebox, filedialog
 from gestion_comercial.config.theme import Theme
-from gestion_comercial.modules.tag_manager.model import TagManagerModel
+from gestion_comercial.config.settings import Settings
+from gestion_comercial.modules.tag_manager.model import TagManagerModel, DOCUMENT_FORMATS
+from gestion_comercial.modules.tag_manager.layouts import LAYOUT_PROFILES, DEFAULT_LAYOUT
+from gestion_comercial.modules.tag_manager.packing import MIXED_LAYOUT
+from gestion_comercial.modules.tag_manager.preview import TagPreview
+from gestion_comercial.modules.tag_manager.batch import ProductBatch
+from gestion_comercial.modules.tag_manager.importer import CatalogImporter, PRICE_PATTERN
+from gestion_comercial.modules.tag_manager.print_queue import PrintJob, PrintJobQueue
+from gestion_comercial.modules.tag_manager.widgets import AutocompleteList, ProductGrid
+
+POLL_INTERVAL_MS = 100
+PREVIEW_DELAY_MS = 30  # coalesces keystrokes into one preview refresh
+
+OUTPUT_TITLES = {
+    'pdf': "PDF",
+    'html': "Navegador",
+    'zpl': "Térmica ZPL",
+    'escpos': "Térmica ESC/POS",
+}
 
 class TagManagerView(tk.Frame):
-    def __init__(self, parent, navigator):
+    def __init__(self, parent, navigator, products=None):
         super().__init__(parent, bg=Theme.BACKGROUND)
         self.navigator = navigator
         self.model = TagManagerModel()
-        
-        self.product_entries = []
-        self.price_entries = []
+        self.print_queue = PrintJobQueue()
+        self.job_importers = {}
+        self.poll_id = None
+        self.preview = None
+        self.preview_id = None
         
         self.setup_ui()
+
+        if products:
+            self.load_products(products)
         
     def setup_ui(self):
         # Top green accent strip
@@ -25,7 +48,9 @@ class TagManagerView(tk.Frame):
         main_container.pack(fill='both', expand=True)
 
         self.create_product_form(main_container)
+        self.create_layout_selector(main_container)
         self.create_button_panel(main_container)
+        self.create_status_bar(main_container)
 
         # Bottom blue accent strip
         self.create_bottom_accent()
@@ -79,36 +104,50 @@ class TagManagerView(tk.Frame):
 
         # Single Header Row
         tk.Label(header_frame, text="Nombre del producto", font=Theme.FONTS['body'], bg=Theme.BACKGROUND, fg='#6b7280').pack(side='left', padx=(90, 0))
-        tk.Label(header_frame, text="Precio", font=Theme.FONTS['body'], bg=Theme.BACKGROUND, fg='#6b7280').pack(side='right', padx=(0, 50))
-        
-        # Rows (1 to 14 in a single column)
-        for row in range(14):
-            self.create_product_row(form_frame, row)
+        tk.Label(header_frame, text="Precio", font=Theme.FONTS['body'], bg=Theme.BACKGROUND, fg='#6b7280').pack(side='right', padx=(0, 70))
 
-    def create_product_row(self, parent, row_index):
-        bg_color = 'white' if row_index % 2 == 0 else '#f8fafc'
-        row_frame = tk.Frame(parent, bg=bg_color, pady=3)
-        row_frame.pack(fill='x')
+        # Catalog suggestions for the name entries
+        self.autocomplete = AutocompleteList(form_frame, self.search_catalog, self.fill_from_catalog)
 
-        self.create_product_field(row_frame, row_index, bg_color)
+        # Scrollable rows: 12 visible row widgets over any number of products
+        self.grid_view = ProductGrid(form_frame, visible_rows=12, on_change=self.schedule_preview)
+        self.grid_view.pack(fill='both', expand=True)
+        self.product_entries = self.grid_view.name_entries
+        self.price_entries = self.grid_view.price_entries
 
-    def create_product_field(self, parent, index, bg_color):
-        tk.Label(parent, text=f"{index+1:02d}", font=Theme.FONTS['body'], bg=bg_color, fg='#6b7280', width=3).pack(side='left', padx=(20, 0))
+        for index, (p_entry, pr_entry) in enumerate(zip(self.product_entries, self.price_entries)):
+            self.autocomplete.attach(p_entry, index)
+            pr_entry.bind('<KeyRelease>', lambda e, idx=index: self.validate_price(e, idx))
+            for entry in (p_entry, pr_entry):
+                entry.bind('<<Paste>>', lambda e, idx=index: self.paste_rows(idx))
 
-        p_entry = tk.Entry(parent, font=Theme.FONTS['body'], bg='white', relief='flat', bd=1, highlightthickness=1, highlightbackground='#e5e7eb')
-        p_entry.pack(side='left', padx=(15, 15), ipady=4, fill='x', expand=True)
-        self.product_entries.append(p_entry)
+    def create_layout_selector(self, parent):
+        frame = tk.Frame(parent, bg=Theme.BACKGROUND)
+        frame.pack(fill='x')
 
-        price_container = tk.Frame(parent, bg=bg_color)
-        price_container.pack(side='right', padx=(0, 20))
+        tk.Label(frame, text="Formato de etiqueta:", font=Theme.FONTS['body'], bg=Theme.BACKGROUND, fg='#6b7280').pack(side='left')
 
-        tk.Label(price_container, text="$", font=Theme.FONTS['body'], bg=bg_color, fg='#6b7280').pack(side='left')
+        titles = {profile.title: key for key, profile in LAYOUT_PROFILES.items()}
+        titles["Mixta (según producto)"] = MIXED_LAYOUT
+        self.layout_var = tk.StringVar(value=LAYOUT_PROFILES[DEFAULT_LAYOUT].title)
+        menu = tk.OptionMenu(frame, self.layout_var, *titles, command=lambda title: self.change_layout(titles[title]))
+        menu.configure(font=Theme.FONTS['body'], bg='white', relief='flat', highlightthickness=1, highlightbackground='#e5e7eb')
+        menu.pack(side='left', padx=(10, 0))
 
-        pr_entry = tk.Entry(price_container, font=Theme.FONTS['body'], bg='white', relief='flat', bd=1, highlightthickness=1, highlightbackground='#e5e7eb', width=12)
-        pr_entry.pack(side='left', padx=(2, 0), ipady=4)
-        self.price_entries.append(pr_entry)
-        
-        pr_entry.bind('<KeyRelease>', lambda e, idx=index: self.validate_price(e, idx))
+        tk.Label(frame, text="Salida:", font=Theme.FONTS['body'], bg=Theme.BACKGROUND, fg='#6b7280').pack(side='left', padx=(20, 0))
+
+        self.output_var = tk.StringVar(value='pdf')
+        self.output_title_var = tk.StringVar(value=OUTPUT_TITLES['pdf'])
+        outputs = {title: key for key, title in OUTPUT_TITLES.items()}
+        output_menu = tk.OptionMenu(frame, self.output_title_var, *outputs, command=lambda title: self.output_var.set(outputs[title]))
+        output_menu.configure(font=Theme.FONTS['body'], bg='white', relief='flat', highlightthickness=1, highlightbackground='#e5e7eb')
+        output_menu.pack(side='left', padx=(5, 0))
+
+        self.only_changed_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            frame, text="Solo precios modificados", variable=self.only_changed_var,
+            font=Theme.FONTS['body'], bg=Theme.BACKGROUND, activebackground=Theme.BACKGROUND
+        ).pack(side='right')
 
     def create_button_panel(self, parent):
         frame = tk.Frame(parent, bg=Theme.BACKGROUND)
@@ -132,6 +171,15 @@ class TagManagerView(tk.Frame):
             hover_color='#1e8449'
         )
 
+        # Import Button (Orange theme)
+        self.create_styled_button(
+            frame,
+            text="Importar Catálogo",
+            command=self.import_catalog,
+            bg_color='#e67e22',
+            hover_color='#ca6f1e'
+        )
+
         # Clear Button (Gray theme)
         self.create_styled_button(
             frame,
@@ -141,6 +189,19 @@ class TagManagerView(tk.Frame):
             hover_color='#5a6268'
         )
 
+    def create_status_bar(self, parent):
+        frame = tk.Frame(parent, bg=Theme.BACKGROUND)
+        frame.pack(fill='x')
+
+        tk.Button(
+            frame, text="Vista previa", command=self.open_preview, font=Theme.FONTS['body'],
+            bg=Theme.BACKGROUND, fg=Theme.TOTAL_FG, activebackground=Theme.BACKGROUND,
+            activeforeground='#0d47a1', relief='flat', bd=0, cursor='hand2'
+        ).pack(side='right')
+
+        self.status_label = tk.Label(frame, text="", font=Theme.FONTS['body'], bg=Theme.BACKGROUND, fg='#6b7280')
+        self.status_label.pack()
+
     def create_styled_button(self, parent, text, command, bg_color, hover_color):
         """Creates a button with hover animation"""
         btn = tk.Button(
@@ -172,20 +233,64 @@ class TagManagerView(tk.Frame):
 
     def validate_price(self, event, index):
         value = self.price_entries[index].get()
-        if value and not re.match(r'^\d*\.?\d*$', value):
+        if value and not PRICE_PATTERN.match(value):
             self.price_entries[index].delete(len(value)-1)
 
+    def search_catalog(self, text):
+        try:
+            return self.model.catalog.search(text)
+        except sqlite3.Error:
+            return []
+
+    def fill_from_catalog(self, index, name, price):
+        self.product_entries[index].delete(0, tk.END)
+        self.product_entries[index].insert(0, name)
+        self.price_entries[index].delete(0, tk.END)
+        self.price_entries[index].insert(0, self.format_price_input(price))
+
+    def paste_rows(self, index):
+        """Pastes spreadsheet rows (name/price, TSV or CSV) starting at the given row.
+
+        Single values fall through to the normal entry paste.
+        """
+        try:
+            text = self.clipboard_get()
+        except tk.TclError:
+            return None
+        if '\t' not in text and '\n' not in text.strip():
+            return None
+
+        importer = CatalogImporter()
+        rows = [
+            (product['name'], self.format_price_input(product['price']))
+            for chunk in importer.iter_chunks_from_lines(text.splitlines(True))
+            for product in chunk
+        ]
+        if rows:
+            self.grid_view.replace_rows(self.grid_view.offset + index, rows)
+        if importer.error_count:
+            messagebox.showwarning("Pegar desde planilla", importer.summary())
+        return 'break'
+
+    def load_products(self, products):
+        """Fills the form with product dicts ({'name': ..., 'price': ...})."""
+        self.grid_view.set_rows((p['name'], self.format_price_input(p['price'])) for p in products)
+
+    def format_price_input(self, price):
+        """Price as typed in the form: no decimals for whole pesos."""
+        return str(int(price)) if price == int(price) else f"{price:g}"
+
     def get_products_data(self):
-        products = []
-        for i in range(14):
-            name = self.product_entries[i].get().strip()
-            price = self.price_entries[i].get().strip()
+        products = ProductBatch()
+        for name, price in self.grid_view.rows:
+            name = name.strip()
+            price = price.strip()
             
             if name and price:
                 try:
                     price_float = float(price)
                     if price_float > 0:
-                        products.append({'name': name, 'price': price_float})
+                        products.append(name, price_float)
                 except ValueError: pass
         return products
 
@@ -195,13 +300,111 @@ class TagManagerView(tk.Frame):
             messagebox.showwarning("Sin Productos", "Ingresa al menos un producto válido.")
             return
             
-        success, result = self.model.print_tags(products)
-        if success:
-            self.after(300000, lambda: self.model.cleanup_temp_file(result))
+        self.submit_print_job(products)
+
+    def import_catalog(self):
+        path = filedialog.askopenfilename(
+            title="Importar catálogo",
+            filetypes=[("Catálogos", "*.csv *.tsv *.txt"), ("Todos los archivos", "*.*")]
+        )
+        if not path:
+            return
+
+        importer = CatalogImporter()
+        job = self.submit_print_job(importer.iter_products(path))
+        self.job_importers[job.id] = importer
+
+    def change_layout(self, key):
+        self.model.set_layout(key)
+        if self.preview is not None:
+            self.preview.set_layout(self.model.layout)
+
+    def open_preview(self):
+        if self.preview is not None:
+            self.preview.lift()
+            return
+        self.preview = TagPreview(self, self.model.layout, on_close=self.on_preview_closed)
+        self.preview.update_products(self.get_products_data())
+
+    def schedule_preview(self):
+        if self.preview is not None and self.preview_id is None:
+            self.preview_id = self.after(PREVIEW_DELAY_MS, self.refresh_preview)
+
+    def refresh_preview(self):
+        self.preview_id = None
+        if self.preview is not None:
+            self.preview.update_products(self.get_products_data())
+
+    def on_preview_closed(self):
+        if self.preview_id is not None:
+            self.after_cancel(self.preview_id)
+            self.preview_id = None
+        self.preview = None
+
+    def submit_print_job(self, products):
+        """Queues products for printing on the background worker."""
+        job = self.print_queue.submit(PrintJob(
+            products,
+            output_format=self.output_var.get(),
+            only_changed=self.only_changed_var.get(),
+            layout=self.model.layout_key,
+            printer=Settings.TAG_PRINTER or None
+        ))
+        self.status_label.config(text="Generando etiquetas...")
+        if self.poll_id is None:
+            self.poll_id = self.after(POLL_INTERVAL_MS, self.poll_print_jobs)
+        return job
+
+    def poll_print_jobs(self):
+        self.poll_id = None
+        for event, job in self.print_queue.poll():
+            if event == 'progress':
+                self.status_label.config(text=f"Generando etiquetas... {job.processed} productos procesados")
+            elif event == PrintJob.DONE:
+                self.on_print_job_finished(job)
+            elif event == PrintJob.FAILED:
+                self.on_print_job_failed(job)
+
+        if self.print_queue.busy:
+            self.poll_id = self.after(POLL_INTERVAL_MS, self.poll_print_jobs)
+
+    def on_print_job_finished(self, job):
+        if job.output_format not in DOCUMENT_FORMATS and job.printer:
+            self.status_label.config(text=f"Etiquetas enviadas a {job.printer} ({job.printed} etiquetas)")
+        elif job.output_format not in DOCUMENT_FORMATS:
+            self.status_label.config(text=f"Archivo para impresora térmica: {job.result}")
         else:
-            messagebox.showerror("Error", result)
+            self.status_label.config(text=f"Etiquetas generadas ({job.printed} etiquetas)")
+        if job.skipped_barcodes:
+            codes = ', '.join(job.skipped_barcodes[:5]) + ('...' if len(job.skipped_barcodes) > 5 else '')
+            messagebox.showwarning(
+                "Códigos de barras",
+                f"{len(job.skipped_barcodes)} etiquetas se imprimieron sin código de barras "
+                f"porque su código no es válido:\n\n{codes}"
+            )
+        importer = self.job_importers.pop(job.id, None)
+        if importer is not None and importer.error_count:
+            messagebox.showwarning("Importación", importer.summary())
+
+    def on_print_job_failed(self, job):
+        self.status_label.config(text="")
+        importer = self.job_importers.pop(job.id, None)
+        message = job.result
+        if importer is not None:
+            message += f"\n\n{importer.summary()}"
+        messagebox.showerror("Error", message)
+
+    def destroy(self):
+        if self.poll_id is not None:
+            self.after_cancel(self.poll_id)
+            self.poll_id = None
+        if self.preview is not None:
+            self.preview.close()
+        self.print_queue.stop()
+        # The print worker has its own model; this one serves autocomplete
+        self.model.close()
+        super().destroy()
 
     def clear_form(self):
         if messagebox.askyesno("Confirmar", "¿Limpiar todo?"):
-            for e in self.product_entries: e.delete(0, tk.END)
-            for e in self.price_entries: e.delete(0, tk.END)
+            self.grid_view.clear()
@@ -0,0 +1,272 @@
+"""
+Reusable widgets for the tag manager view.
+"""
+import tkinter as tk
+from gestion_comercial.config.theme import Theme
+
+NAVIGATION_KEYS = {'Up', 'Down', 'Left', 'Right', 'Return', 'Escape', 'Tab',
+                   'Shift_L', 'Shift_R', 'Control_L', 'Control_R', 'Alt_L', 'Alt_R'}
+
+
+class AutocompleteList:
+    """Suggestion dropdown shown under product name entries.
+
+    `search(text)` returns (name, price) tuples; `on_select(index, name, price)`
+    is called with the form row index when a suggestion is picked.
+    """
+
+    def __init__(self, master, search, on_select, max_items=8):
+        self.search = search
+        self.on_select = on_select
+        self.max_items = max_items
+        self.entry = None
+        self.index = None
+        self.results = []
+
+        self.listbox = tk.Listbox(
+            master, font=Theme.FONTS['body'], bg='white', relief='flat', bd=1,
+            highlightthickness=1, highlightbackground='#cbd5e1', activestyle='none',
+            selectbackground=Theme.TOTAL_FG, selectforeground='white', height=max_items
+        )
+        self.listbox.bind('<ButtonRelease-1>', lambda e: self.select())
+        self.listbox.bind('<Return>', lambda e: self.select())
+        self.listbox.bind('<Escape>', lambda e: self.hide(focus_entry=True))
+        self.listbox.bind('<FocusOut>', lambda e: self.hide_later())
+
+    def attach(self, entry, index):
+        """Enables suggestions for a name entry of the given form row."""
+        entry.bind('<KeyRelease>', lambda e: self.on_key(e, entry, index), add='+')
+        entry.bind('<Down>', lambda e: self.focus_list(), add='+')
+        entry.bind('<Escape>', lambda e: self.hide(), add='+')
+        entry.bind('<FocusOut>', lambda e: self.hide_later(), add='+')
+
+    def on_key(self, event, entry, index):
+        if event.keysym in NAVIGATION_KEYS:
+            return
+        self.show(entry, index)
+
+    def show(self, entry, index):
+        self.entry = entry
+        self.index = index
+        self.results = self.search(entry.get())
+        if not self.results:
+            self.hide()
+            return
+
+        self.listbox.delete(0, tk.END)
+        for name, price in self.results:
+            self.listbox.insert(tk.END, f"{name}  —  ${int(round(price)):,}".replace(",", "."))
+        self.listbox.configure(height=min(len(self.results), self.max_items))
+        self.listbox.place(in_=entry, relx=0, rely=1, relwidth=1)
+        self.listbox.lift()
+
+    def focus_list(self):
+        if self.results and self.listbox.winfo_ismapped():
+            self.listbox.focus_set()
+            self.listbox.selection_clear(0, tk.END)
+            self.listbox.selection_set(0)
+            self.listbox.activate(0)
+
+    def select(self):
+        selection = self.listbox.curselection()
+        if not selection or self.entry is None:
+            return
+        name, price = self.results[selection[0]]
+        entry, index = self.entry, self.index
+        self.hide()
+        self.on_select(index, name, price)
+        entry.focus_set()
+
+    def hide_later(self):
+        # Give a click on the list time to land before hiding it
+        self.listbox.after(150, self._hide_if_unfocused)
+
+    def _hide_if_unfocused(self):
+        try:
+            if self.listbox.focus_get() is not self.listbox:
+                self.hide()
+        except (KeyError, tk.TclError):
+            self.hide()
+
+    def hide(self, focus_entry=False):
+        self.listbox.place_forget()
+        self.results = []
+        if focus_entry and self.entry is not None:
+            self.entry.focus_set()
+
+
+class ProductGrid(tk.Frame):
+    """Scrollable product form backed by a plain list of rows.
+
+    Only `visible_rows` row widgets exist; scrolling reloads them with the
+    rows at the new offset, so the working set can hold thousands of
+    products at the cost of the visible window.
+    """
+
+    def __init__(self, master, visible_rows=14, min_rows=14, on_change=None):
+        super().__init__(master, bg='white')
+        self.visible_rows = visible_rows
+        self.min_rows = min_rows
+        self.on_change = on_change
+        self.rows = [['', ''] for _ in range(min_rows)]
+        self.offset = 0
+        self.loading = False
+
+        self.slot_widgets = []
+        self.name_entries = []
+        self.price_entries = []
+        self.name_vars = []
+        self.price_vars = []
+
+        body = tk.Frame(self, bg='white')
+        body.pack(side='left', fill='both', expand=True)
+        self.scrollbar = tk.Scrollbar(self, orient='vertical', command=self.yview)
+        self.scrollbar.pack(side='right', fill='y')
+
+        for slot in range(visible_rows):
+            self.create_slot(body, slot)
+        self.refresh()
+
+    def create_slot(self, parent, slot):
+        row_frame = tk.Frame(parent, bg='white', pady=3)
+        row_frame.pack(fill='x')
+
+        number = tk.Label(row_frame, font=Theme.FONTS['body'], bg='white', fg='#6b7280', width=4)
+        number.pack(side='left', padx=(16, 0))
+
+        name_var = tk.StringVar()
+        name_entry = tk.Entry(row_frame, textvariable=name_var, font=Theme.FONTS['body'], bg='white', relief='flat', bd=1, highlightthickness=1, highlightbackground='#e5e7eb')
+        name_entry.pack(side='left', padx=(15, 15), ipady=4, fill='x', expand=True)
+
+        price_container = tk.Frame(row_frame, bg='white')
+        price_container.pack(side='right', padx=(0, 20))
+
+        dollar = tk.Label(price_container, text="$", font=Theme.FONTS['body'], bg='white', fg='#6b7280')
+        dollar.pack(side='left')
+
+        price_var = tk.StringVar()
+        price_entry = tk.Entry(price_container, textvariable=price_var, font=Theme.FONTS['body'], bg='white', relief='flat', bd=1, highlightthickness=1, highlightbackground='#e5e7eb', width=12)
+        price_entry.pack(side='left', padx=(2, 0), ipady=4)
+
+        # Every edit (typing, paste, autocomplete) is written through to the row data
+        name_var.trace_add('write', lambda *args, s=slot: self.store(s, 0, self.name_vars[s].get()))
+        price_var.trace_add('write', lambda *args, s=slot: self.store(s, 1, self.price_vars[s].get()))
+
+        for widget in (row_frame, number, name_entry, price_container, dollar, price_entry):
+            widget.bind('<MouseWheel>', self.on_mousewheel)
+            widget.bind('<Button-4>', lambda e: self.scroll(-1))
+            widget.bind('<Button-5>', lambda e: self.scroll(1))
+        price_entry.bind('<Return>', lambda e, s=slot: self.focus_row(self.offset + s + 1))
+        price_entry.bind('<Down>', lambda e, s=slot: self.focus_row(self.offset + s + 1))
+        price_entry.bind('<Up>', lambda e, s=slot: self.focus_row(self.offset + s - 1))
+
+        self.slot_widgets.append((row_frame, number, price_container, dollar))
+        self.name_entries.append(name_entry)
+        self.price_entries.append(price_entry)
+        self.name_vars.append(name_var)
+        self.price_vars.append(price_var)
+
+    # Data
+    def store(self, slot, column, value):
+        if self.loading:
+            return
+        index = self.offset + slot
+        if self.rows[index][column] == value:
+            return
+        self.rows[index][column] = value
+        if index == len(self.rows) - 1 and value:
+            # Typing in the last row opens a new empty one
+            self.rows.append(['', ''])
+            self.update_scrollbar()
+        self.changed()
+
+    def set_rows(self, rows):
+        """Replaces the working set; only the visible rows touch widgets."""
+        self.rows = [[name, price] for name, price in rows]
+        self.rows.extend(['', ''] for _ in range(max(1, self.min_rows - len(self.rows))))
+        if self.rows[-1] != ['', '']:
+            self.rows.append(['', ''])
+        self.offset = 0
+        self.refresh()
+        self.changed()
+
+    def replace_rows(self, start, rows):
+        """Writes `rows` from index `start` on, appending as needed, with a single refresh."""
+        rows = [[name, price] for name, price in rows]
+        end = start + len(rows)
+        if end > len(self.rows):
+            self.rows.extend(['', ''] for _ in range(end - len(self.rows)))
+        self.rows[start:end] = rows
+        if self.rows[-1] != ['', '']:
+            self.rows.append(['', ''])
+        self.refresh()
+        self.changed()
+
+    def clear(self):
+        self.set_rows([])
+
+    def changed(self):
+        if self.on_change is not None:
+            self.on_change()
+
+    # Viewport
+    def refresh(self):
+        """Loads the rows at the current offset into the slot widgets."""
+        self.loading = True
+        try:
+            for slot, (row_frame, number, price_container, dollar) in enumerate(self.slot_widgets):
+                index = self.offset + slot
+                visible = index < len(self.rows)
+                name, price = self.rows[index] if visible else ('', '')
+                self.name_vars[slot].set(name)
+                self.price_vars[slot].set(price)
+
+                bg_color = 'white' if index % 2 == 0 else '#f8fafc'
+                for widget in (row_frame, number, price_container, dollar):
+                    widget.configure(bg=bg_color)
+                number.configure(text=f"{index + 1:02d}" if visible else "")
+                state = 'normal' if visible else 'disabled'
+                self.name_entries[slot].configure(state=state)
+                self.price_entries[slot].configure(state=state)
+        finally:
+            self.loading = False
+        self.update_scrollbar()
+
+    def update_scrollbar(self):
+        total = max(len(self.rows), 1)
+        self.scrollbar.set(self.offset / total, min(1.0, (self.offset + self.visible_rows) / total))
+
+    def max_offset(self):
+        return max(0, len(self.rows) - self.visible_rows)
+
+    def scroll_to(self, offset):
+        offset = max(0, min(self.max_offset(), offset))
+        if offset != self.offset:
+            self.offset = offset
+            self.refresh()
+
+    def scroll(self, rows):
+        self.scroll_to(self.offset + rows)
+
+    def yview(self, *args):
+        if args[0] == 'moveto':
+            self.scroll_to(int(round(float(args[1]) * len(self.rows))))
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            if args[2] == 'pages':
+                amount *= self.visible_rows - 1
+            self.scroll(amount)
+
+    def on_mousewheel(self, event):
+        self.scroll(-1 if event.delta > 0 else 1)
+
+    def focus_row(self, index):
+        """Moves the keyboard focus to the price of a row, scrolling if needed."""
+        if not 0 <= index < len(self.rows):
+            return 'break'
+        if index < self.offset:
+            self.scroll_to(index)
+        elif index >= self.offset + self.visible_rows:
+            self.scroll_to(index - self.visible_rows + 1)
+        self.price_entries[index - self.offset].focus_set()
+        return 'break'
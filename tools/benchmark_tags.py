@@ -0,0 +1,342 @@
+"""
+Benchmarks del Gestor de Etiquetas
+==================================
+
+Herramienta para el DESARROLLADOR. Mide el rendimiento de la generación
+de etiquetas con catálogos sintéticos.
+
+USO:
+    python tools/benchmark_tags.py [cantidad_de_productos]
+"""
+
+import gc
+import http.client
+import io
+import json
+import os
+import random
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gestion_comercial.modules.tag_manager.model import TagManagerModel
+from gestion_comercial.modules.tag_manager.catalog import ProductCatalog
+from gestion_comercial.modules.tag_manager.batch import ProductBatch
+from gestion_comercial.modules.tag_manager.parallel import CHUNK_PAGES
+from gestion_comercial.modules.tag_manager.barcode import ean13_check_digit
+from gestion_comercial.modules.tag_manager.spooler import PrintSpooler
+from gestion_comercial.modules.tag_manager import api as tag_api
+from gestion_comercial.modules.tag_manager.layouts import LAYOUT_PROFILES
+from gestion_comercial.modules.tag_manager.packing import (
+    LABEL_SIZES, SHEET_WIDTH, SHEET_HEIGHT, MIXED_LAYOUT, pack_labels
+)
+
+WORDS = ['Leche', 'Entera', 'Pan', 'Molde', 'Arroz', 'Grado', 'Aceite', 'Maravilla',
+         'Azúcar', 'Té', 'Café', 'Instantáneo', 'Galletas', 'Chocolate', 'Bebida',
+         'Jugo', 'Néctar', 'Durazno', 'Detergente', 'Líquido', '1L', '500g', '1kg']
+
+
+def make_products(count, seed=42):
+    """Builds a realistic synthetic catalog."""
+    rng = random.Random(seed)
+    price_points = [490, 590, 790, 990, 1290, 1490, 1990, 2490, 3990, 5990, 12990]
+    return [
+        {
+            'name': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))),
+            'price': rng.choice(price_points),
+        }
+        for _ in range(count)
+    ]
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def report(name, seconds, pages, size=None):
+    line = f"  {name:<28} {seconds * 1000:9.1f} ms  {pages / seconds:10.1f} páginas/s"
+    if size is not None:
+        line += f"  {size / 1024:9.1f} KB"
+    print(line)
+
+
+def bench_formatting(model, products):
+    prices = [p['price'] for p in products]
+    _, seconds = timed(model.format_prices, prices)
+    print(f"  {'Formato de precios':<28} {seconds * 1000:9.1f} ms  {len(prices) / seconds:10.0f} precios/s")
+
+
+def bench_html(model, products):
+    stream = io.StringIO()
+    count, seconds = timed(model.write_html, products, stream)
+    pages = -(-count // model.layout.labels_per_page)
+    report("HTML", seconds, pages, len(stream.getvalue().encode('utf-8')))
+
+
+def bench_pdf(model, products):
+    stream = io.BytesIO()
+    count, seconds = timed(model.write_pdf, products, stream)
+    pages = -(-count // model.layout.labels_per_page)
+    report("PDF", seconds, pages, len(stream.getvalue()))
+
+
+def with_barcodes(products, distinct=3000, seed=11):
+    """Adds EAN-13 codes, with repeats as in a real catalog."""
+    rng = random.Random(seed)
+    codes = []
+    for _ in range(distinct):
+        digits = '780' + ''.join(rng.choice('0123456789') for _ in range(9))
+        codes.append(digits + ean13_check_digit(digits))
+    return [dict(p, barcode=rng.choice(codes)) for p in products]
+
+
+def bench_barcodes(count):
+    """Tag generation time with and without barcodes, on catalogs not seen yet by the caches."""
+    for name, write, make_stream in (("HTML", "write_html", io.StringIO), ("PDF", "write_pdf", io.BytesIO)):
+        plain_products = make_products(count, seed=len(name))
+        barcoded = with_barcodes(make_products(count, seed=len(name) + 100))
+        model = TagManagerModel()
+        _, plain = timed(getattr(model, write), plain_products, make_stream())
+        _, seconds = timed(getattr(model, write), barcoded, make_stream())
+        _, reprint = timed(getattr(model, write), barcoded, make_stream())
+        print(f"  {name + ' con código de barras':<28} {seconds * 1000:9.1f} ms  {seconds / plain:6.2f}x sin código"
+              f"  (reimpresión {reprint * 1000:.1f} ms)")
+
+
+def retained_memory(build, runs=5):
+    """
+    Average bytes still held by build()'s result after garbage collection.
+
+    A first untraced run interns the names and warms the allocator's free
+    lists, so those one-time costs do not land on whichever run is first.
+    """
+    build()
+    sizes = []
+    for _ in range(runs):
+        gc.collect()
+        tracemalloc.start()
+        data = build()
+        gc.collect()
+        sizes.append(tracemalloc.get_traced_memory()[0])
+        tracemalloc.stop()
+        del data
+    return sum(sizes) / runs, min(sizes), max(sizes)
+
+
+def bench_batch(products):
+    """Memory per product and HTML time for dicts versus ProductBatch columns (names shared by both)."""
+    per_product = {}
+    for name, build in (("dicts", lambda: [dict(p) for p in products]),
+                        ("ProductBatch", lambda: ProductBatch.from_products(products))):
+        size, low, high = retained_memory(build)
+        per_product[name] = size / len(products)
+        _, seconds = timed(TagManagerModel().write_html, build(), io.StringIO())
+        print(f"  {'Memoria: ' + name:<28} {size / len(products):9.1f} B/producto"
+              f"  ({low / len(products):.1f}-{high / len(products):.1f})  HTML {seconds * 1000:7.1f} ms")
+    print(f"  {'':<28} {per_product['dicts'] / per_product['ProductBatch']:.1f}x menos memoria con ProductBatch")
+
+
+def with_sizes(products, mix=(('shelf', 7), ('promo', 1), ('small', 2)), seed=5):
+    """Assigns label sizes in the given proportions."""
+    rng = random.Random(seed)
+    sizes = [size for size, weight in mix for _ in range(weight)]
+    return [dict(p, size=rng.choice(sizes)) for p in products]
+
+
+def bench_packing(products):
+    """Sheets used by the packer versus one sheet stock per size and the area lower bound."""
+    mixed = with_sizes(products)
+    profiles = {size: LAYOUT_PROFILES[key] for size, key in LABEL_SIZES.items()}
+    sizes = [(profiles[p['size']].label_width, profiles[p['size']].label_height) for p in mixed]
+
+    sheets, seconds = timed(pack_labels, sizes)
+    area = sum(width * height for width, height in sizes)
+    bound = -(-area // (SHEET_WIDTH * SHEET_HEIGHT))
+    uniform = sum(
+        -(-sum(1 for p in mixed if p['size'] == size) // profile.labels_per_page)
+        for size, profile in profiles.items()
+    )
+    print(f"  {'Empaquetado mixto':<28} {seconds * 1000:9.1f} ms  {len(sheets):6d} hojas"
+          f"  (por formato {uniform}, mínimo {bound:.0f})")
+
+    model = TagManagerModel(MIXED_LAYOUT)
+    stream = io.BytesIO()
+    _, seconds = timed(model.write_mixed_pdf, mixed, stream)
+    report("PDF mixto", seconds, len(sheets), len(stream.getvalue()))
+
+
+def bench_parallel(products):
+    """Compares single-process and process-pool generation of the same documents."""
+    workers = os.cpu_count() or 1
+    for name, write in (("HTML", "write_html"), ("PDF", "write_pdf")):
+        model = TagManagerModel()
+        stream = io.StringIO() if name == "HTML" else io.BytesIO()
+        _, base = timed(getattr(model, write), products, stream)
+        reference = stream.getvalue()
+
+        for count in sorted({2, 4, workers}):
+            model = TagManagerModel(workers=count)
+            # Start the pool outside the measurement, as the print worker keeps it alive
+            warm_up = products[:count * CHUNK_PAGES * model.layout.labels_per_page]
+            getattr(model, write)(warm_up, io.StringIO() if name == "HTML" else io.BytesIO(), True)
+            stream = io.StringIO() if name == "HTML" else io.BytesIO()
+            _, seconds = timed(getattr(model, write), products, stream, True)
+            model.close()
+            same = "idéntico" if stream.getvalue() == reference else "DISTINTO"
+            print(f"  {name + f' paralelo x{count}':<28} {seconds * 1000:9.1f} ms  "
+                  f"{base / seconds:6.2f}x vs 1 proceso  ({same}, {workers} CPU)")
+
+
+def bench_catalog(products, queries=2000):
+    with tempfile.TemporaryDirectory() as directory:
+        catalog = ProductCatalog(os.path.join(directory, 'catalog.db'))
+        unique = {p['name']: p for p in products}.values()
+        _, seconds = timed(catalog.upsert_many, list(unique))
+        print(f"  {'Catálogo: carga':<28} {seconds * 1000:9.1f} ms  {catalog.count()} productos")
+
+        rng = random.Random(7)
+        latencies = []
+        for _ in range(queries):
+            # Mix name prefixes with multi-word queries that need the word index
+            words = [rng.choice(WORDS) for _ in range(rng.randint(1, 3))]
+            prefix = ' '.join(words)[:rng.randint(1, 20)]
+            start = time.perf_counter()
+            catalog.search(prefix)
+            latencies.append(time.perf_counter() - start)
+        catalog.close()
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    print(f"  {'Catálogo: autocompletar':<28} p50 {p50:6.2f} ms  p99 {p99:6.2f} ms")
+
+
+class StandInPrinter(socketserver.ThreadingTCPServer):
+    """Local TCP printer on port 9100 style: reads and counts everything sent."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        self.received = 0
+        self.connections = 0
+        self.lock = threading.Lock()
+        super().__init__(('127.0.0.1', 0), StandInHandler)
+
+    @property
+    def uri(self):
+        return f"raw://127.0.0.1:{self.server_address[1]}"
+
+
+class StandInHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        with self.server.lock:
+            self.server.connections += 1
+        while True:
+            try:
+                data = self.request.recv(65536)
+            except (ConnectionError, socket.timeout):
+                return
+            if not data:
+                return
+            with self.server.lock:
+                self.server.received += len(data)
+
+
+def bench_spooler(model, products, jobs=200):
+    printer = StandInPrinter()
+    threading.Thread(target=printer.serve_forever, daemon=True).start()
+
+    per_job = max(1, len(products) // jobs)
+    documents = []
+    for start in range(0, per_job * jobs, per_job):
+        stream = io.BytesIO()
+        model.write_thermal(products[start:start + per_job], stream, 'zpl')
+        documents.append(stream.getvalue())
+
+    spooler = PrintSpooler()
+    start = time.perf_counter()
+    sent = [spooler.submit(printer.uri, data=document) for document in documents]
+    for job in sent:
+        job.done.wait()
+    spooler.stop()
+    seconds = time.perf_counter() - start
+    total = sum(map(len, documents))
+    while printer.received < total and time.perf_counter() - start < 5:
+        time.sleep(0.01)
+    printer.shutdown()
+    printer.server_close()
+
+    stats = spooler.metrics()
+    print(f"  {'Impresora de red (ZPL)':<28} {seconds * 1000:9.1f} ms  {len(sent) / seconds:10.1f} trabajos/s"
+          f"  {total / seconds / 1024 / 1024:7.1f} MB/s")
+    print(f"  {'':<28} {stats['batches']} envíos, {printer.connections} conexión(es), "
+          f"{printer.received}/{total} bytes recibidos")
+
+
+def bench_api(products, clients=8, requests=5, batch=500):
+    """Concurrent clients posting JSON batches to the local HTTP API."""
+    server = tag_api.start_in_thread(port=0)
+    body = json.dumps(products[:batch])
+
+    def post(path, payload=None):
+        connection = http.client.HTTPConnection('127.0.0.1', server.port, timeout=60)
+        connection.request('POST' if payload else 'GET', path, body=payload,
+                           headers={'Content-Type': 'application/json'})
+        data = connection.getresponse().read()
+        connection.close()
+        return data
+
+    def client():
+        for _ in range(requests):
+            post('/tags?format=pdf', body)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+    stats = json.loads(post('/metrics'))
+    server.close()
+
+    total = clients * requests
+    print(f"  {'API HTTP (PDF)':<28} {seconds * 1000:9.1f} ms  {total / seconds:10.1f} solicitudes/s"
+          f"  {total * batch / seconds:8.0f} etiquetas/s")
+    print(f"  {'':<28} latencia p50 {stats['latency_p50_ms']:.1f} ms  p99 {stats['latency_p99_ms']:.1f} ms"
+          f"  primer byte p50 {stats['first_byte_p50_ms']:.1f} ms")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    products = make_products(count)
+    model = TagManagerModel()
+
+    print("=" * 70)
+    print(f" BENCHMARK ETIQUETAS - {count} productos")
+    print("=" * 70)
+
+    bench_formatting(model, products)
+    bench_html(model, products)
+    bench_pdf(model, products)
+    bench_barcodes(count)
+    bench_batch(products)
+    bench_packing(products)
+    bench_parallel(products)
+    bench_catalog(products)
+    bench_spooler(model, products)
+    bench_api(products)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Simulador de Balanza
+====================
+
+Herramienta para el DESARROLLADOR. Abre una pseudo-terminal que se
+comporta como una balanza serial: emite lecturas continuas con ruido,
+pasa por estados de movimiento y estabilidad, y usa los protocolos más
+comunes (SICS, A&D o número simple).
+
+USO:
+    python tools/scale_simulator.py [sics|ad|plain] [lecturas_por_segundo]
+
+Luego inicie la aplicación con GESTION_BALANZA=<ruta mostrada>. Con
+--benchmark mide cuántas lecturas por segundo procesa el lector.
+
+Solo Linux/macOS (usa os.openpty).
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gestion_comercial.modules.cash_counter.scale import ScaleReader
+
+COIN_GRAMS = {100: 7.57, 50: 7.0, 10: 3.5}
+NOISE_GRAMS = 0.02
+SETTLE_SECONDS = 0.6
+
+
+def format_sics(grams, stable):
+    return f"S {'S' if stable else 'D'} {grams:10.2f} g\r\n"
+
+
+def format_ad(grams, stable):
+    return f"{'ST' if stable else 'US'},GS,{grams:+09.2f}  g\r\n"
+
+
+def format_plain(grams, stable):
+    return f"{grams:9.2f} g\r\n"
+
+
+PROTOCOLS = {'sics': format_sics, 'ad': format_ad, 'plain': format_plain}
+
+
+class ScaleSimulator:
+    """Writes scale lines into a pseudo-terminal at a fixed rate."""
+
+    def __init__(self, protocol='sics', rate=20, seed=1):
+        self.format = PROTOCOLS[protocol]
+        self.rate = rate
+        self.rng = random.Random(seed)
+        self.master, slave = os.openpty()
+        self.path = os.ttyname(slave)
+        self.slave = slave  # kept open so the pty stays alive between readers
+        self.target = 0.0
+        self.shown = 0.0
+        self.changed_at = time.perf_counter()
+        self.lines = 0
+        self.running = False
+        self.thread = None
+
+    def load(self, grams):
+        """Puts a load on the pan; readings move towards it and then settle."""
+        self.target = grams
+        self.changed_at = time.perf_counter()
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+        os.close(self.master)
+        os.close(self.slave)
+
+    def line(self):
+        moving = time.perf_counter() - self.changed_at < SETTLE_SECONDS
+        if moving:
+            self.shown += (self.target - self.shown) * 0.5 + self.rng.uniform(-2, 2)
+        else:
+            self.shown = self.target + self.rng.uniform(-NOISE_GRAMS, NOISE_GRAMS)
+        return self.format(max(0.0, self.shown), not moving)
+
+    def _run(self):
+        interval = 1 / self.rate if self.rate else 0
+        next_time = time.perf_counter()
+        while self.running:
+            os.write(self.master, self.line().encode('ascii'))
+            self.lines += 1
+            if interval:
+                next_time += interval
+                time.sleep(max(0.0, next_time - time.perf_counter()))
+
+
+def benchmark(protocol, seconds=3):
+    """Sin límite de velocidad: mide las lecturas que el lector alcanza a procesar."""
+    simulator = ScaleSimulator(protocol, rate=0)
+    reader = ScaleReader(simulator.path)
+    reader.start()
+    simulator.start()
+    simulator.load(COIN_GRAMS[100] * 40)
+    time.sleep(seconds)
+    simulator.stop()
+    reader.stop()
+    stats = reader.metrics()
+    print(f"  {protocol:<6} {stats['lines_per_second']:10.0f} líneas/s  "
+          f"{stats['readings']} lecturas, {stats['settled']} pesos estables")
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if '--benchmark' in sys.argv:
+        for protocol in PROTOCOLS:
+            benchmark(protocol)
+        return
+
+    protocol = args[0] if args else 'sics'
+    rate = float(args[1]) if len(args) > 1 else 20
+    simulator = ScaleSimulator(protocol, rate)
+    simulator.start()
+    print(f"Balanza simulada ({protocol}, {rate:g} lecturas/s) en: {simulator.path}")
+    print("Ingrese un peso en gramos o 'moneda cantidad' (ej: '100 40'); vacío para salir.")
+    try:
+        while True:
+            text = input("> ").split()
+            if not text:
+                break
+            if len(text) == 2:
+                simulator.load(COIN_GRAMS[int(text[0])] * int(text[1]))
+            else:
+                simulator.load(float(text[0]))
+    except (EOFError, KeyboardInterrupt, ValueError, KeyError):
+        pass
+    simulator.stop()
+
+
+if __name__ == "__main__":
+    main()